@@ -1,8 +1,10 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
+from datetime import datetime
+
+from data_models import safe_roi
+
+NS_PER_DAY = 86_400_000_000_000
 
 class AnalyticsEngine:
     """Advanced analytics engine for influencer campaign analysis"""
@@ -12,84 +14,95 @@ class AnalyticsEngine:
         self.benchmark_roas = 4.0  # 4:1 ROAS benchmark
         
     def apply_filters(self, data_manager, platform, brand, category, date_range):
+        """Filter all datasets by platform, brand/campaign, category and date range.
         
-        filtered_data = {
-            'influencers': data_manager.influencers.copy(),
-            'posts': data_manager.posts.copy(),
-            'tracking': data_manager.tracking_data.copy(),
-            'payouts': data_manager.payouts.copy()
-        }
+        Results are memoized per filter combination and data version, so the
+        returned frames are shared and must not be modified in place.
+        """
+        start_ns = end_ns = None
+        if len(date_range) == 2:
+            start_ns = pd.to_datetime(date_range[0]).value
+            end_ns = pd.to_datetime(date_range[1]).value
+        
+        filtered_data = self._filtered_views(data_manager, platform, brand, category, start_ns, end_ns)
+        return dict(filtered_data)
+    
+    def _filtered_views(self, data_manager, platform, brand, category, start_ns, end_ns):
+        """Get the filtered views, cached on the data manager until its data changes"""
+        return data_manager.get_cached(
+            ('filtered_views', platform, brand, category, start_ns, end_ns),
+            lambda: self._compute_filtered_views(data_manager, platform, brand, category, start_ns, end_ns)
+        )
+    
+    def _compute_filtered_views(self, data_manager, platform, brand, category, start_ns, end_ns):
+        """Compute filtered views of all four tables"""
+        influencers = data_manager.influencers
+        posts = data_manager.posts
+        tracking = data_manager.tracking_data
+        payouts = data_manager.payouts
 
-        # Ensure date columns are datetime
-        if 'date' in filtered_data['posts'].columns:
-            filtered_data['posts']['date'] = pd.to_datetime(filtered_data['posts']['date'], errors='coerce')
-        if 'date' in filtered_data['tracking'].columns:
-            filtered_data['tracking']['date'] = pd.to_datetime(filtered_data['tracking']['date'], errors='coerce')
+        # Resolve the surviving influencers once from the platform and category filters
+        # into a lookup array indexed by influencer code
+        keep = None
+        if platform != 'All' or category != 'All':
+            influencer_mask = np.ones(len(influencers), dtype=bool)
+            if platform != 'All':
+                influencer_mask &= (influencers['platform'] == platform).values
+            if category != 'All':
+                influencer_mask &= (influencers['category'] == category).values
+            influencer_codes = data_manager.get_influencer_codes('influencers')
+            keep = np.zeros(len(influencer_codes) + 1, dtype=bool)
+            keep[influencer_codes[influencer_mask]] = True
 
-        # Apply platform filter
-        if platform != 'All':
-            influencer_ids = filtered_data['influencers'][
-                filtered_data['influencers']['platform'] == platform
-            ]['ID'].tolist()
+        # Date range bounds as datetime64[ns] scalars
+        start_date = end_date = None
+        if start_ns is not None:
+            start_date = np.datetime64(start_ns, 'ns')
+            end_date = np.datetime64(end_ns, 'ns')
 
-            filtered_data['posts'] = filtered_data['posts'][
-                filtered_data['posts']['influencer_id'].isin(influencer_ids)
-            ]
-            filtered_data['tracking'] = filtered_data['tracking'][
-                filtered_data['tracking']['influencer_id'].isin(influencer_ids)
-            ]
-            filtered_data['payouts'] = filtered_data['payouts'][
-                filtered_data['payouts']['influencer_id'].isin(influencer_ids)
-            ]
-            filtered_data['influencers'] = filtered_data['influencers'][
-                filtered_data['influencers']['ID'].isin(influencer_ids)
-            ]
+        # Select the surviving rows of each table in one pass
+        def codes(table):
+            return data_manager.get_influencer_codes(table) if keep is not None else None
 
-        # Apply category filter
-        if category != 'All':
-            influencer_ids = filtered_data['influencers'][
-                filtered_data['influencers']['category'] == category
-            ]['ID'].tolist()
+        filtered_data = {
+            'influencers': self._select_rows(influencers, keep, codes('influencers')),
+            'posts': self._select_rows(posts, keep, codes('posts'),
+                                       start_date=start_date, end_date=end_date),
+            'tracking': self._select_rows(tracking, keep, codes('tracking'), brand=brand,
+                                          start_date=start_date, end_date=end_date),
+            'payouts': self._select_rows(payouts, keep, codes('payouts'))
+        }
 
-            filtered_data['posts'] = filtered_data['posts'][
-                filtered_data['posts']['influencer_id'].isin(influencer_ids)
-            ]
-            filtered_data['tracking'] = filtered_data['tracking'][
-                filtered_data['tracking']['influencer_id'].isin(influencer_ids)
-            ]
-            filtered_data['payouts'] = filtered_data['payouts'][
-                filtered_data['payouts']['influencer_id'].isin(influencer_ids)
-            ]
-            filtered_data['influencers'] = filtered_data['influencers'][
-                filtered_data['influencers']['ID'].isin(influencer_ids)
-            ]
+        return filtered_data
 
-        # Apply brand/campaign filter
-        if brand != 'All':
-            filtered_data['tracking'] = filtered_data['tracking'][
-                filtered_data['tracking']['campaign'] == brand
-            ]
+    def _select_rows(self, df, keep=None, codes=None, brand='All', start_date=None, end_date=None):
+        """Select the rows of df that pass the influencer, brand and date filters.
 
-        # Apply date filter
-        if len(date_range) == 2:
-            start_date = pd.to_datetime(date_range[0])
-            end_date = pd.to_datetime(date_range[1])
+        DataManager keeps date-keyed tables sorted by date (NaT last), so the
+        date range is resolved to a contiguous slice with two binary searches
+        before the remaining filters are combined into one boolean mask.
+        """
+        if df.empty:
+            return df.copy()
 
-            if not filtered_data['posts'].empty:
-                filtered_data['posts'] = filtered_data['posts'][
-                    (filtered_data['posts']['date'] >= start_date) &
-                    (filtered_data['posts']['date'] <= end_date)
-                ]
+        lo, hi = 0, len(df)
+        if start_date is not None and 'date' in df.columns:
+            date_vals = df['date'].values
+            lo = np.searchsorted(date_vals, start_date, side='left')
+            hi = np.searchsorted(date_vals, end_date, side='right')
+            df = df.iloc[lo:hi]
 
-            if not filtered_data['tracking'].empty:
-                filtered_data['tracking'] = filtered_data['tracking'][
-                    (filtered_data['tracking']['date'] >= start_date) &
-                    (filtered_data['tracking']['date'] <= end_date)
-                ]
+        if keep is None and brand == 'All':
+            return df
 
-        return filtered_data
+        mask = np.ones(len(df), dtype=bool)
+        if keep is not None:
+            mask &= keep[codes[lo:hi]]
+        if brand != 'All':
+            mask &= (df['campaign'] == brand).values
+
+        return df[mask]
 
-    
     def calculate_roi_roas(self, filtered_data):
         """Calculate ROI and ROAS metrics"""
         tracking_data = filtered_data['tracking']
@@ -104,14 +117,13 @@ class AnalyticsEngine:
             }
         
         # Calculate total revenue and costs
-        total_revenue = tracking_data['revenue'].sum()
+        total_revenue = tracking_data['revenue'].values.sum()
         
         # Estimate costs from payouts
         if len(payouts_data) > 0:
-            # Get influencers in tracking data
-            influencer_ids = tracking_data['influencer_id'].unique()
-            relevant_payouts = payouts_data[payouts_data['influencer_id'].isin(influencer_ids)]
-            total_cost = relevant_payouts['total_payout'].sum()
+            # Only count payouts for influencers present in tracking data
+            relevant = np.isin(payouts_data['influencer_id'].values, tracking_data['influencer_id'].values)
+            total_cost = payouts_data['total_payout'].values[relevant].sum()
         else:
             # Estimate cost as 25% of revenue if no payout data
             total_cost = total_revenue * 0.25
@@ -142,117 +154,156 @@ class AnalyticsEngine:
         if len(tracking_data) == 0 or len(influencers_data) == 0:
             return pd.DataFrame()
         
-        # Aggregate performance by influencer
-        performance = tracking_data.groupby('influencer_id').agg({
-            'revenue': 'sum',
-            'orders': 'sum'
-        }).reset_index()
-        
-        # Add influencer details
-        performance = performance.merge(
-            influencers_data[['ID', 'name', 'platform', 'category', 'follower_count']],
-            left_on='influencer_id',
-            right_on='ID',
+        # Aggregate performance by influencer and attach details via an index join
+        performance = tracking_data.groupby('influencer_id', sort=False, observed=True)[
+            ['revenue', 'orders']
+        ].sum()
+        performance = performance.join(
+            influencers_data.set_index('ID')[['name', 'platform', 'category', 'follower_count']],
             how='left'
         )
         
         # Add engagement metrics if posts data is available
         if len(posts_data) > 0:
-            engagement_metrics = posts_data.groupby('influencer_id').agg({
-                'reach': 'sum',
-                'likes': 'sum',
-                'comments': 'sum'
-            }).reset_index()
+            engagement_metrics = posts_data.groupby('influencer_id', sort=False, observed=True)[
+                ['reach', 'likes', 'comments']
+            ].sum()
             
             engagement_metrics['engagement_rate'] = (
                 (engagement_metrics['likes'] + engagement_metrics['comments']) / 
                 engagement_metrics['reach'] * 100
             ).fillna(0)
             
-            performance = performance.merge(
-                engagement_metrics,
-                on='influencer_id',
-                how='left'
-            )
+            performance = performance.join(engagement_metrics, how='left')
+        
+        performance = performance.rename_axis('influencer_id').reset_index()
+        
+        # Calculate additional metrics, yielding 0 instead of inf/NaN for zero denominators
+        revenue = performance['revenue'].to_numpy(dtype=np.float64)
+        orders = performance['orders'].to_numpy(dtype=np.float64)
+        follower_count = performance['follower_count'].to_numpy(dtype=np.float64)
+        if 'reach' in performance.columns:
+            reach = performance['reach'].fillna(1).to_numpy(dtype=np.float64)
+        else:
+            reach = np.ones(len(performance))
+        
+        performance['revenue_per_follower'] = np.divide(
+            revenue, follower_count, out=np.zeros(len(performance)), where=follower_count > 0
+        )
+        performance['orders_per_post'] = np.divide(
+            orders, reach, out=np.zeros(len(performance)), where=reach > 0
+        )
         
-        # Calculate additional metrics
-        performance['revenue_per_follower'] = performance['revenue'] / performance['follower_count']
-        performance['orders_per_post'] = performance['orders'] / performance.get('reach', 1).fillna(1)
+        # Return top performers by revenue
+        return performance.nlargest(limit, 'revenue')
+    
+    def get_dashboard_data(self, data_manager, platform, brand, category, date_range, limit=10):
+        """Filtered data, ROI/ROAS metrics and top performers for one dashboard view.
+        
+        Memoized like apply_filters, so reruns with unchanged filters and data
+        skip the aggregations; the returned frames must not be modified in place.
+        """
+        start_ns = end_ns = None
+        if len(date_range) == 2:
+            start_ns = pd.to_datetime(date_range[0]).value
+            end_ns = pd.to_datetime(date_range[1]).value
         
-        # Sort by revenue and return top performers
-        return performance.sort_values('revenue', ascending=False).head(limit)
+        filtered_data, roi_data, top_performers = data_manager.get_cached(
+            ('dashboard_data', platform, brand, category, start_ns, end_ns, limit),
+            lambda: self._compute_dashboard_data(data_manager, platform, brand, category, start_ns, end_ns, limit)
+        )
+        return dict(filtered_data), dict(roi_data), top_performers
+    
+    def _compute_dashboard_data(self, data_manager, platform, brand, category, start_ns, end_ns, limit):
+        """Compute the dashboard view"""
+        filtered_data = self._filtered_views(data_manager, platform, brand, category, start_ns, end_ns)
+        if len(filtered_data['tracking']) == 0:
+            return filtered_data, {}, pd.DataFrame()
+        return filtered_data, self.calculate_roi_roas(filtered_data), self.get_top_performers(filtered_data, limit)
     
     def generate_insights(self, data_manager):
-        """Generate comprehensive insights from all data"""
+        """Generate comprehensive insights from all data.
+        
+        Memoized per data version; the returned frames are shared and must
+        not be modified in place.
+        """
+        return dict(data_manager.get_cached(
+            ('insights',), lambda: self._compute_insights(data_manager)
+        ))
+    
+    def _compute_insights(self, data_manager):
+        """Compute insights from all data"""
         insights = {}
         
+        # Join tracking data with influencer details once and share it across helpers,
+        # projecting both sides down to the columns the helpers read
+        if len(data_manager.tracking_data) > 0 and len(data_manager.influencers) > 0:
+            tracking_keys = data_manager.tracking_data[['influencer_id', 'revenue', 'orders']]
+            tracking_keys = tracking_keys[tracking_keys['influencer_id'].notna()]
+            merged_df = tracking_keys.join(
+                data_manager.influencers.set_index('ID')[['platform', 'category']],
+                on='influencer_id',
+                how='left'
+            )
+        else:
+            merged_df = pd.DataFrame()
+        
+        # Per-influencer totals shared by the top and poor performer analyses
+        influencer_performance = self._influencer_performance(data_manager)
+        
         # Top influencers analysis
-        insights['top_influencers'] = self._analyze_top_influencers(data_manager)
+        insights['top_influencers'] = self._analyze_top_influencers(influencer_performance)
         
         # Platform analysis
-        insights['platform_analysis'] = self._analyze_platforms(data_manager)
+        insights['platform_analysis'] = self._analyze_platforms(merged_df, data_manager.posts)
         
         # Category analysis
-        insights['category_analysis'] = self._analyze_categories(data_manager)
+        insights['category_analysis'] = self._analyze_categories(data_manager.influencers, merged_df)
         
         # Poor performers
-        insights['poor_performers'] = self._identify_poor_performers(data_manager)
+        insights['poor_performers'] = self._identify_poor_performers(influencer_performance)
         
         # Trend analysis
         insights['trends'] = self._analyze_trends(data_manager)
         
         return insights
     
-    def _analyze_top_influencers(self, data_manager):
-        """Analyze top performing influencers"""
-        if len(data_manager.tracking_data) == 0:
-            return {'by_revenue': pd.DataFrame(), 'by_roi': pd.DataFrame()}
+    def _influencer_performance(self, data_manager):
+        """Aggregate revenue, orders and estimated ROI per influencer"""
+        if len(data_manager.tracking_data) == 0 or len(data_manager.influencers) == 0:
+            return pd.DataFrame()
         
-        # Merge tracking data with influencer info
-        merged_df = data_manager.tracking_data.merge(
-            data_manager.influencers,
-            left_on='influencer_id',
-            right_on='ID',
-            how='left'
-        )
+        # Reuse the cached per-influencer totals and attach labels via an index join
+        performance = data_manager.get_per_influencer_totals().join(
+            data_manager.influencers.set_index('ID')[['name', 'platform']],
+            how='inner'
+        ).rename_axis('influencer_id').reset_index()
         
-        # Group by influencer
-        influencer_performance = merged_df.groupby(['influencer_id', 'name', 'platform']).agg({
-            'revenue': 'sum',
-            'orders': 'sum'
-        }).reset_index()
-        
-        # Calculate ROI (assuming 25% cost of revenue)
-        influencer_performance['cost'] = influencer_performance['revenue'] * 0.25
-        influencer_performance['roi'] = ((influencer_performance['revenue'] - influencer_performance['cost']) / 
-                                       influencer_performance['cost'] * 100).fillna(0)
+        return performance[['influencer_id', 'name', 'platform', 'revenue', 'orders', 'cost', 'roi']]
+    
+    def _analyze_top_influencers(self, influencer_performance):
+        """Analyze top performing influencers"""
+        if len(influencer_performance) == 0:
+            return {'by_revenue': pd.DataFrame(), 'by_roi': pd.DataFrame()}
         
         # Top by revenue
-        top_by_revenue = influencer_performance.sort_values('revenue', ascending=False).head(10)
+        top_by_revenue = influencer_performance.nlargest(10, 'revenue')
         
         # Top by ROI
-        top_by_roi = influencer_performance.sort_values('roi', ascending=False).head(10)
+        top_by_roi = influencer_performance.nlargest(10, 'roi')
         
         return {
             'by_revenue': top_by_revenue,
             'by_roi': top_by_roi
         }
     
-    def _analyze_platforms(self, data_manager):
-        """Analyze performance by platform"""
-        if len(data_manager.tracking_data) == 0 or len(data_manager.influencers) == 0:
+    def _analyze_platforms(self, merged_df, posts):
+        """Analyze performance by platform from tracking data joined with influencers"""
+        if len(merged_df) == 0:
             return pd.DataFrame()
         
-        # Merge data
-        merged_df = data_manager.tracking_data.merge(
-            data_manager.influencers,
-            left_on='influencer_id',
-            right_on='ID',
-            how='left'
-        )
-        
         # Platform analysis
-        platform_stats = merged_df.groupby('platform').agg({
+        platform_stats = merged_df.groupby('platform', observed=True).agg({
             'revenue': 'sum',
             'orders': 'sum',
             'influencer_id': 'nunique'
@@ -266,11 +317,15 @@ class AnalyticsEngine:
         ).round(2)
         
         # Add engagement rate if posts data is available
-        if len(data_manager.posts) > 0 and 'platform' in data_manager.posts.columns:
-            engagement_by_platform = data_manager.posts.groupby('platform').apply(
-                lambda x: ((x['likes'].sum() + x['comments'].sum()) / x['reach'].sum() * 100) if x['reach'].sum() > 0 else 0
-            ).reset_index()
-            engagement_by_platform.columns = ['platform', 'avg_engagement_rate']
+        if len(posts) > 0 and 'platform' in posts.columns:
+            platform_totals = posts.groupby('platform', sort=False, observed=True)[
+                ['likes', 'comments', 'reach']
+            ].sum()
+            engagement_by_platform = (
+                (platform_totals['likes'] + platform_totals['comments']) /
+                platform_totals['reach'].where(platform_totals['reach'] > 0)
+            ).fillna(0) * 100
+            engagement_by_platform = engagement_by_platform.rename('avg_engagement_rate').reset_index()
             
             platform_stats = platform_stats.merge(engagement_by_platform, on='platform', how='left')
         else:
@@ -278,17 +333,16 @@ class AnalyticsEngine:
         
         # Calculate ROI
         platform_stats['estimated_cost'] = platform_stats['total_revenue'] * 0.25
-        platform_stats['avg_roi'] = ((platform_stats['total_revenue'] - platform_stats['estimated_cost']) / 
-                                    platform_stats['estimated_cost'] * 100).fillna(0)
+        platform_stats['avg_roi'] = safe_roi(platform_stats['total_revenue'], platform_stats['estimated_cost'])
         
         return platform_stats
     
-    def _analyze_categories(self, data_manager):
+    def _analyze_categories(self, influencers, merged_df):
         """Analyze performance by influencer category"""
-        if len(data_manager.influencers) == 0:
+        if len(influencers) == 0:
             return pd.DataFrame()
         
-        category_stats = data_manager.influencers.groupby('category').agg({
+        category_stats = influencers.groupby('category', observed=True).agg({
             'follower_count': ['count', 'mean', 'sum'],
             'ID': 'count'
         }).round(2)
@@ -297,15 +351,8 @@ class AnalyticsEngine:
         category_stats = category_stats.reset_index()
         
         # Add revenue data if available
-        if len(data_manager.tracking_data) > 0:
-            merged_df = data_manager.tracking_data.merge(
-                data_manager.influencers,
-                left_on='influencer_id',
-                right_on='ID',
-                how='left'
-            )
-            
-            revenue_by_category = merged_df.groupby('category').agg({
+        if len(merged_df) > 0:
+            revenue_by_category = merged_df.groupby('category', observed=True).agg({
                 'revenue': 'sum',
                 'orders': 'sum'
             }).reset_index()
@@ -317,100 +364,103 @@ class AnalyticsEngine:
             
             # Calculate ROI
             category_stats['estimated_cost'] = category_stats['revenue'] * 0.25
-            category_stats['avg_roi'] = ((category_stats['revenue'] - category_stats['estimated_cost']) / 
-                                        category_stats['estimated_cost'] * 100).fillna(0)
+            category_stats['avg_roi'] = safe_roi(category_stats['revenue'], category_stats['estimated_cost'])
         
         return category_stats
     
-    def _identify_poor_performers(self, data_manager):
+    def _identify_poor_performers(self, influencer_performance):
         """Identify underperforming influencers"""
-        if len(data_manager.tracking_data) == 0 or len(data_manager.influencers) == 0:
+        if len(influencer_performance) == 0:
             return pd.DataFrame()
         
-        # Get performance data
-        merged_df = data_manager.tracking_data.merge(
-            data_manager.influencers,
-            left_on='influencer_id',
-            right_on='ID',
-            how='left'
-        )
-        
-        performance = merged_df.groupby(['influencer_id', 'name', 'platform']).agg({
-            'revenue': 'sum',
-            'orders': 'sum'
-        }).reset_index()
-        
-        # Calculate ROI
-        performance['cost'] = performance['revenue'] * 0.25
-        performance['roi'] = ((performance['revenue'] - performance['cost']) / 
-                             performance['cost'] * 100).fillna(0)
+        performance = influencer_performance
         
         # Identify poor performers (ROI < benchmark)
         poor_performers = performance[performance['roi'] < self.benchmark_roi].copy()
         
         # Add reasons
-        poor_performers['reason'] = poor_performers.apply(
-            lambda row: self._get_poor_performance_reason(row), axis=1
-        )
+        poor_performers['reason'] = self._get_poor_performance_reasons(poor_performers)
         
         return poor_performers.sort_values('roi')
     
-    def _get_poor_performance_reason(self, row):
-        """Determine reason for poor performance"""
-        if row['revenue'] < 1000:
-            return "Low revenue generation"
-        elif row['orders'] < 10:
-            return "Low order conversion"
-        elif row['roi'] < 50:
-            return "Very low ROI"
-        else:
-            return "Below benchmark ROI"
+    def _get_poor_performance_reasons(self, performance):
+        """Determine reason for poor performance for every row at once"""
+        return np.select(
+            [
+                performance['revenue'].values < 1000,
+                performance['orders'].values < 10,
+                performance['roi'].values < 50
+            ],
+            ["Low revenue generation", "Low order conversion", "Very low ROI"],
+            default="Below benchmark ROI"
+        )
     
     def _analyze_trends(self, data_manager):
         """Analyze trends over time"""
         if len(data_manager.tracking_data) == 0:
             return {}
         
-        # Daily trends
-        daily_trends = data_manager.tracking_data.groupby('date').agg({
-            'revenue': 'sum',
-            'orders': 'sum'
-        }).reset_index()
+        arrays = data_manager.get_tracking_arrays()
+        date_i8 = arrays['date_i8']
+        valid = date_i8 != np.iinfo(np.int64).min
+        revenue = arrays['revenue'][valid]
+        orders = arrays['orders'][valid]
+        days_since_epoch = date_i8[valid] // NS_PER_DAY
         
-        # Weekly trends
-        data_manager.tracking_data['week'] = pd.to_datetime(data_manager.tracking_data['date']).dt.isocalendar().week
-        weekly_trends = data_manager.tracking_data.groupby('week').agg({
-            'revenue': 'sum',
-            'orders': 'sum'
-        }).reset_index()
+        # Daily trends
+        days, day_revenue, day_orders = self._sum_by_bucket(days_since_epoch, revenue, orders)
+        daily_trends = pd.DataFrame({
+            'date': (days * NS_PER_DAY).view('datetime64[ns]'),
+            'revenue': day_revenue,
+            'orders': day_orders
+        })
+        
+        # Weekly trends: 1970-01-01 was a Thursday, so shifting by 3 days
+        # makes each bucket start on a Monday
+        weeks, week_revenue, week_orders = self._sum_by_bucket((days_since_epoch + 3) // 7, revenue, orders)
+        weekly_trends = pd.DataFrame({
+            'week': ((weeks * 7 - 3) * NS_PER_DAY).view('datetime64[ns]'),
+            'revenue': week_revenue,
+            'orders': week_orders
+        })
         
         return {
             'daily': daily_trends,
             'weekly': weekly_trends
         }
     
+    def _sum_by_bucket(self, buckets, revenue, orders):
+        """Sum revenue and orders per distinct integer bucket using bincount"""
+        uniques, inverse = np.unique(buckets, return_inverse=True)
+        bucket_revenue = np.bincount(inverse, weights=revenue, minlength=len(uniques))
+        bucket_orders = np.bincount(inverse, weights=orders, minlength=len(uniques)).astype(np.int64)
+        return uniques, bucket_revenue, bucket_orders
+    
     def calculate_incremental_roas(self, data_manager, baseline_period_days=30):
         """Calculate incremental ROAS by comparing to baseline"""
         if len(data_manager.tracking_data) == 0:
             return 0
         
-        # Get recent data
-        recent_date = data_manager.tracking_data['date'].max()
-        baseline_start = recent_date - timedelta(days=baseline_period_days)
+        arrays = data_manager.get_tracking_arrays()
+        date_i8 = arrays['date_i8']
+        revenue = arrays['revenue']
+        valid = date_i8 != np.iinfo(np.int64).min
+        if not valid.any():
+            return 0
         
-        baseline_data = data_manager.tracking_data[
-            data_manager.tracking_data['date'] < baseline_start
-        ]
-        recent_data = data_manager.tracking_data[
-            data_manager.tracking_data['date'] >= baseline_start
-        ]
+        # Split rows at the start of the recent window in a single comparison
+        baseline_start = date_i8[valid].max() - baseline_period_days * NS_PER_DAY
+        is_recent = date_i8 >= baseline_start
+        is_baseline = valid & ~is_recent
         
-        if len(baseline_data) == 0 or len(recent_data) == 0:
+        recent_count = np.count_nonzero(is_recent)
+        baseline_count = np.count_nonzero(is_baseline)
+        if baseline_count == 0 or recent_count == 0:
             return 0
         
-        # Calculate baseline metrics
-        baseline_revenue = baseline_data['revenue'].mean()
-        recent_revenue = recent_data['revenue'].mean()
+        # Calculate baseline metrics, skipping missing revenue like Series.mean
+        baseline_revenue = np.nanmean(revenue[is_baseline])
+        recent_revenue = np.nanmean(revenue[is_recent])
         
         # Incremental revenue
         incremental_revenue = recent_revenue - baseline_revenue
@@ -1,14 +1,14 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from datetime import datetime, timedelta
+import io
 import os
 
 # Import custom modules
-from data_models import DataManager
+from data_models import DataManager, db_manager, fetch_tables_from_db
 from analytics import AnalyticsEngine
-from utils import export_to_csv, export_to_pdf
+from utils import export_to_csv, export_to_pdf, lttb_downsample, read_csv
 
 # Configure page
 st.set_page_config(
@@ -18,9 +18,14 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource(ttl=300, show_spinner=False)
+def _load_all_tables():
+    """Database snapshot shared by all sessions; cleared after every write"""
+    return fetch_tables_from_db(db_manager) if db_manager else None
+
 # Initialize session state
 if 'data_manager' not in st.session_state:
-    st.session_state.data_manager = DataManager()
+    st.session_state.data_manager = DataManager(tables=_load_all_tables())
 if 'analytics' not in st.session_state:
     st.session_state.analytics = AnalyticsEngine()
 if 'current_page' not in st.session_state:
@@ -108,6 +113,67 @@ def main():
     elif page == "Database Management":
         show_database_management_page()
 
+def _cached_figure(key, build):
+    """Reuse a Plotly figure from this session while its inputs are unchanged.
+    
+    key must capture everything the figure depends on, normally the data
+    version plus any filters; build is only called on a miss.
+    """
+    figures = st.session_state.setdefault('figure_cache', {})
+    if key not in figures:
+        if len(figures) >= 64:
+            figures.clear()
+        figures[key] = build()
+    return figures[key]
+
+def _platform_revenue_figure(data_manager, tracking, platform, brand, category, date_range):
+    """Bar chart of revenue by influencer platform"""
+    import plotly.express as px
+    
+    # Let the database filter and aggregate when the tables were loaded from it
+    start_date, end_date = date_range if len(date_range) == 2 else (None, None)
+    platform_revenue = data_manager.query_tracking_summary(platform, brand, category, start_date, end_date)
+    if platform_revenue is None:
+        platform_revenue = tracking[['influencer_id', 'revenue']].join(
+            data_manager.influencers.set_index('ID')['platform'], on='influencer_id', how='left'
+        ).groupby('platform', sort=False, observed=True)['revenue'].sum().reset_index()
+    platform_revenue = platform_revenue[['platform', 'revenue']]
+    platform_revenue.columns = ['Platform', 'Revenue']
+    
+    return px.bar(
+        platform_revenue, 
+        x='Platform', 
+        y='Revenue',
+        title="Revenue by Platform",
+        color='Revenue',
+        color_continuous_scale='viridis'
+    )
+
+def _revenue_trend_figure(tracking):
+    """WebGL line chart of daily revenue, downsampled to at most 2000 points"""
+    import plotly.express as px
+    
+    trend_data = tracking.groupby('date').agg({
+        'revenue': 'sum',
+        'orders': 'sum'
+    }).reset_index()
+    
+    # Cap the plotted points while keeping visible peaks and valleys
+    if len(trend_data) > 2000:
+        kept = lttb_downsample(trend_data['date'].values.astype('int64'), trend_data['revenue'].values, 2000)
+        trend_data = trend_data.iloc[kept]
+    
+    fig_trend = px.line(
+        trend_data, 
+        x='date', 
+        y='revenue',
+        title="Revenue Trend Over Time",
+        labels={'revenue': 'Revenue (₹)', 'date': 'Date'},
+        render_mode='webgl'
+    )
+    fig_trend.update_layout(hovermode='closest')
+    return fig_trend
+
 def show_dashboard():
     st.title("📊 Campaign Performance Dashboard")
     
@@ -122,31 +188,35 @@ def show_dashboard():
     
     # Filters
     st.subheader("🔍 Filters")
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        platforms = ['All'] + list(data_manager.influencers['platform'].unique())
-        selected_platform = st.selectbox("Platform", platforms)
-    
-    with col2:
-        brands = ['All'] + list(data_manager.tracking_data['campaign'].unique())
-        selected_brand = st.selectbox("Brand/Campaign", brands)
-    
-    with col3:
-        categories = ['All'] + list(data_manager.influencers['category'].unique())
-        selected_category = st.selectbox("Category", categories)
-    
-    with col4:
-        date_range = st.date_input(
-            "Date Range",
-            value=[datetime.now() - timedelta(days=30), datetime.now()],
-            max_value=datetime.now()
-        )
+    # Widgets inside the form only trigger a rerun when Apply is pressed
+    with st.form("dashboard_filters"):
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            platforms = ['All'] + data_manager.get_filter_options('influencers', 'platform')
+            selected_platform = st.selectbox("Platform", platforms)
+        
+        with col2:
+            brands = ['All'] + data_manager.get_filter_options('tracking', 'campaign')
+            selected_brand = st.selectbox("Brand/Campaign", brands)
+        
+        with col3:
+            categories = ['All'] + data_manager.get_filter_options('influencers', 'category')
+            selected_category = st.selectbox("Category", categories)
+        
+        with col4:
+            date_range = st.date_input(
+                "Date Range",
+                value=[datetime.now() - timedelta(days=30), datetime.now()],
+                max_value=datetime.now()
+            )
+        
+        st.form_submit_button("Apply Filters")
     
-    # Apply filters
-    filtered_data = analytics.apply_filters(
+    # Apply filters and compute the cached metrics for this view
+    filtered_data, roi_data, top_performers = analytics.get_dashboard_data(
         data_manager, selected_platform, selected_brand, 
-        selected_category, date_range
+        selected_category, tuple(date_range), limit=10
     )
     
     if len(filtered_data['tracking']) == 0:
@@ -159,7 +229,7 @@ def show_dashboard():
     total_revenue = filtered_data['tracking']['revenue'].sum()
     total_orders = filtered_data['tracking']['orders'].sum()
     total_reach = filtered_data['posts']['reach'].sum()
-    total_engagement = filtered_data['posts']['likes'].sum() + filtered_data['posts']['comments'].sum()
+    total_engagement = int(filtered_data['posts'][['likes', 'comments']].values.sum())
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -173,57 +243,67 @@ def show_dashboard():
     
     # ROI and ROAS Calculations
     st.subheader("💰 ROI & ROAS Analysis")
-    roi_data = analytics.calculate_roi_roas(filtered_data)
-    
     col1, col2 = st.columns(2)
     with col1:
         st.metric("Average ROI", f"{roi_data['avg_roi']:.1f}%", f"{roi_data['roi_change']:+.1f}%")
     with col2:
         st.metric("Average ROAS", f"{roi_data['avg_roas']:.2f}x", f"{roi_data['roas_change']:+.2f}x")
     
-    # Charts
+    # Charts, rebuilt only when the data or the applied filters change
+    view_key = (data_manager.version, selected_platform, selected_brand, selected_category, tuple(date_range))
     col1, col2 = st.columns(2)
     
     with col1:
-        # Revenue by Platform
-        platform_revenue = filtered_data['tracking'].groupby(
-            filtered_data['tracking']['influencer_id'].map(
-                dict(zip(data_manager.influencers['ID'], data_manager.influencers['platform']))
+        fig_platform = _cached_figure(
+            ('platform_revenue',) + view_key,
+            lambda: _platform_revenue_figure(
+                data_manager, filtered_data['tracking'],
+                selected_platform, selected_brand, selected_category, tuple(date_range)
             )
-        )['revenue'].sum().reset_index()
-        platform_revenue.columns = ['Platform', 'Revenue']
-        
-        fig_platform = px.bar(
-            platform_revenue, 
-            x='Platform', 
-            y='Revenue',
-            title="Revenue by Platform",
-            color='Revenue',
-            color_continuous_scale='viridis'
         )
         st.plotly_chart(fig_platform, use_container_width=True)
     
     with col2:
-        # Performance Trend
-        trend_data = filtered_data['tracking'].groupby('date').agg({
-            'revenue': 'sum',
-            'orders': 'sum'
-        }).reset_index()
-        
-        fig_trend = px.line(
-            trend_data, 
-            x='date', 
-            y='revenue',
-            title="Revenue Trend Over Time",
-            labels={'revenue': 'Revenue (₹)', 'date': 'Date'}
+        fig_trend = _cached_figure(
+            ('revenue_trend',) + view_key,
+            lambda: _revenue_trend_figure(filtered_data['tracking'])
         )
         st.plotly_chart(fig_trend, use_container_width=True)
     
     # Top Performers Table
     st.subheader("🏆 Top Performing Influencers")
-    top_performers = analytics.get_top_performers(filtered_data, limit=10)
     st.dataframe(top_performers, use_container_width=True)
 
+@st.cache_data(show_spinner=False, persist="disk")
+def _load_and_validate(raw_bytes: bytes, required_cols: tuple, parse_dates: tuple = ()):
+    """Parse an uploaded CSV once per file content; returns (df, missing_cols)"""
+    df = read_csv(io.BytesIO(raw_bytes), date_columns=parse_dates)
+    missing = set(required_cols).difference(df.columns)
+    return df, missing
+
+def _handle_upload(label, key, required_cols, save_fn, record_label, date_cols=()):
+    """Render one upload tab: file picker, column check, save and preview"""
+    st.subheader(f"{label} Data")
+    st.markdown(f"**Required columns:** {', '.join(required_cols)}")
+    
+    uploaded_file = st.file_uploader(f"Upload {label} CSV", type="csv", key=key)
+    if uploaded_file:
+        try:
+            df, missing = _load_and_validate(uploaded_file.getvalue(), required_cols, date_cols)
+            
+            if not missing:
+                success = save_fn(df)
+                _load_all_tables.clear()
+                if success:
+                    st.success(f"✅ Saved {len(df)} {record_label} to database successfully!")
+                    st.dataframe(df.head())
+                else:
+                    st.error(f"❌ Failed to save {record_label} to database")
+            else:
+                st.error(f"❌ Missing required columns: {missing}")
+        except Exception as e:
+            st.error(f"Error loading file: {str(e)}")
+
 def show_upload_page():
     st.title("📁 Data Upload")
     
@@ -237,96 +317,37 @@ def show_upload_page():
     data_manager = st.session_state.data_manager
     
     with tab1:
-        st.subheader("Influencers Data")
-        st.markdown("**Required columns:** ID, name, category, gender, follower_count, platform")
-        
-        uploaded_file = st.file_uploader("Upload Influencers CSV", type="csv", key="influencers")
-        if uploaded_file:
-            try:
-                df = pd.read_csv(uploaded_file)
-                required_cols = ['ID', 'name', 'category', 'gender', 'follower_count', 'platform']
-                
-                if all(col in df.columns for col in required_cols):
-                    success = data_manager.save_influencers_to_db(df)
-                    if success:
-                        st.success(f"✅ Saved {len(df)} influencers to database successfully!")
-                        st.dataframe(df.head())
-                    else:
-                        st.error("❌ Failed to save influencers to database")
-                else:
-                    st.error(f"❌ Missing required columns: {set(required_cols) - set(df.columns)}")
-            except Exception as e:
-                st.error(f"Error loading file: {str(e)}")
+        _handle_upload(
+            "Influencers", "influencers",
+            ('ID', 'name', 'category', 'gender', 'follower_count', 'platform'),
+            data_manager.save_influencers_to_db, "influencers"
+        )
     
     with tab2:
-        st.subheader("Posts Data")
-        st.markdown("**Required columns:** influencer_id, platform, date, URL, caption, reach, likes, comments")
-        
-        uploaded_file = st.file_uploader("Upload Posts CSV", type="csv", key="posts")
-        if uploaded_file:
-            try:
-                df = pd.read_csv(uploaded_file)
-                required_cols = ['influencer_id', 'platform', 'date', 'URL', 'caption', 'reach', 'likes', 'comments']
-                
-                if all(col in df.columns for col in required_cols):
-                    df['date'] = pd.to_datetime(df['date'])
-                    success = data_manager.save_posts_to_db(df)
-                    if success:
-                        st.success(f"Saved {len(df)} posts to database successfully!")
-                        st.dataframe(df.head())
-                    else:
-                        st.error("Failed to save posts to database")
-                else:
-                    st.error(f"Missing required columns: {set(required_cols) - set(df.columns)}")
-            except Exception as e:
-                st.error(f"Error loading file: {str(e)}")
+        _handle_upload(
+            "Posts", "posts",
+            ('influencer_id', 'platform', 'date', 'URL', 'caption', 'reach', 'likes', 'comments'),
+            data_manager.save_posts_to_db, "posts", date_cols=('date',)
+        )
     
     with tab3:
-        st.subheader("Tracking Data")
-        st.markdown("**Required columns:** source, campaign, influencer_id, user_id, product, date, orders, revenue")
-        
-        uploaded_file = st.file_uploader("Upload Tracking CSV", type="csv", key="tracking")
-        if uploaded_file:
-            try:
-                df = pd.read_csv(uploaded_file)
-                required_cols = ['source', 'campaign', 'influencer_id', 'user_id', 'product', 'date', 'orders', 'revenue']
-                
-                if all(col in df.columns for col in required_cols):
-                    df['date'] = pd.to_datetime(df['date'])
-                    success = data_manager.save_tracking_data_to_db(df)
-                    if success:
-                        st.success(f"✅ Saved {len(df)} tracking records to database successfully!")
-                        st.dataframe(df.head())
-                    else:
-                        st.error("❌ Failed to save tracking data to database")
-                else:
-                    st.error(f"❌ Missing required columns: {set(required_cols) - set(df.columns)}")
-            except Exception as e:
-                st.error(f"Error loading file: {str(e)}")
+        _handle_upload(
+            "Tracking", "tracking",
+            ('source', 'campaign', 'influencer_id', 'user_id', 'product', 'date', 'orders', 'revenue'),
+            data_manager.save_tracking_data_to_db, "tracking records", date_cols=('date',)
+        )
     
     with tab4:
-        st.subheader("Payouts Data")
-        st.markdown("**Required columns:** influencer_id, basis, rate, orders, total_payout")
-        
-        uploaded_file = st.file_uploader("Upload Payouts CSV", type="csv", key="payouts")
-        if uploaded_file:
-            try:
-                df = pd.read_csv(uploaded_file)
-                required_cols = ['influencer_id', 'basis', 'rate', 'orders', 'total_payout']
-                
-                if all(col in df.columns for col in required_cols):
-                    success = data_manager.save_payouts_to_db(df)
-                    if success:
-                        st.success(f"✅ Saved {len(df)} payout records to database successfully!")
-                        st.dataframe(df.head())
-                    else:
-                        st.error("❌ Failed to save payouts to database")
-                else:
-                    st.error(f"❌ Missing required columns: {set(required_cols) - set(df.columns)}")
-            except Exception as e:
-                st.error(f"Error loading file: {str(e)}")
+        _handle_upload(
+            "Payouts", "payouts",
+            ('influencer_id', 'basis', 'rate', 'orders', 'total_payout'),
+            data_manager.save_payouts_to_db, "payout records"
+        )
 
 def show_insights_page():
+    # Plotly is only imported by the pages that draw charts
+    import plotly.express as px
+    
     st.title("🔍 Advanced Insights")
     
     data_manager = st.session_state.data_manager
@@ -352,25 +373,25 @@ def show_insights_page():
     with col1:
         st.markdown("**By Revenue**")
         top_revenue = insights['top_influencers']['by_revenue']
-        fig_revenue = px.bar(
+        fig_revenue = _cached_figure(('top_revenue', data_manager.version), lambda: px.bar(
             top_revenue.head(10), 
             x='revenue', 
             y='name',
             orientation='h',
             title="Top 10 by Revenue Generated"
-        )
+        ))
         st.plotly_chart(fig_revenue, use_container_width=True)
     
     with col2:
         st.markdown("**By ROI**")
         top_roi = insights['top_influencers']['by_roi']
-        fig_roi = px.bar(
+        fig_roi = _cached_figure(('top_roi', data_manager.version), lambda: px.bar(
             top_roi.head(10), 
             x='roi', 
             y='name',
             orientation='h',
             title="Top 10 by ROI"
-        )
+        ))
         st.plotly_chart(fig_roi, use_container_width=True)
     
     # Platform Analysis
@@ -380,30 +401,30 @@ def show_insights_page():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        fig_platform_revenue = px.pie(
+        fig_platform_revenue = _cached_figure(('platform_revenue_share', data_manager.version), lambda: px.pie(
             platform_stats, 
             values='total_revenue', 
             names='platform',
             title="Revenue Distribution by Platform"
-        )
+        ))
         st.plotly_chart(fig_platform_revenue, use_container_width=True)
     
     with col2:
-        fig_platform_engagement = px.bar(
+        fig_platform_engagement = _cached_figure(('platform_engagement', data_manager.version), lambda: px.bar(
             platform_stats, 
             x='platform', 
             y='avg_engagement_rate',
             title="Average Engagement Rate by Platform"
-        )
+        ))
         st.plotly_chart(fig_platform_engagement, use_container_width=True)
     
     with col3:
-        fig_platform_roi = px.bar(
+        fig_platform_roi = _cached_figure(('platform_roi', data_manager.version), lambda: px.bar(
             platform_stats, 
             x='platform', 
             y='avg_roi',
             title="Average ROI by Platform"
-        )
+        ))
         st.plotly_chart(fig_platform_roi, use_container_width=True)
     
     # Poor Performing Campaigns
@@ -422,18 +443,21 @@ def show_insights_page():
     st.subheader("🎯 Category Performance")
     category_stats = insights['category_analysis']
     
-    fig_category = px.scatter(
+    fig_category = _cached_figure(('category', data_manager.version), lambda: px.scatter(
         category_stats,
         x='avg_follower_count',
         y='avg_revenue_per_post',
         size='total_posts',
         color='category',
         title="Category Performance: Followers vs Revenue per Post",
-        hover_data=['avg_roi']
-    )
+        hover_data=['avg_roi'],
+        render_mode='webgl'
+    ).update_layout(hovermode='closest'))
     st.plotly_chart(fig_category, use_container_width=True)
 
 def show_payouts_page():
+    import plotly.express as px
+    
     st.title("💸 Payout Management")
     
     data_manager = st.session_state.data_manager
@@ -462,29 +486,29 @@ def show_payouts_page():
     
     with col1:
         # Payout by basis
-        basis_summary = data_manager.payouts.groupby('basis').agg({
+        basis_summary = data_manager.payouts.groupby('basis', observed=True).agg({
             'total_payout': 'sum',
             'influencer_id': 'count'
         }).reset_index()
         basis_summary.columns = ['Basis', 'Total_Payout', 'Count']
         
-        fig_basis = px.pie(
+        fig_basis = _cached_figure(('basis', data_manager.version), lambda: px.pie(
             basis_summary,
             values='Total_Payout',
             names='Basis',
             title="Payout Distribution by Basis"
-        )
+        ))
         st.plotly_chart(fig_basis, use_container_width=True)
     
     with col2:
         # Rate distribution
-        fig_rates = px.histogram(
+        fig_rates = _cached_figure(('rates', data_manager.version), lambda: px.histogram(
             data_manager.payouts,
             x='rate',
             color='basis',
             title="Rate Distribution by Payout Basis",
             nbins=20
-        )
+        ))
         st.plotly_chart(fig_rates, use_container_width=True)
     
     # Detailed payout table
@@ -503,16 +527,15 @@ def show_payouts_page():
     with col1:
         search_term = st.text_input("Search by influencer name")
     with col2:
-        basis_filter = st.selectbox("Filter by basis", ['All'] + list(data_manager.payouts['basis'].unique()))
+        basis_filter = st.selectbox("Filter by basis", ['All'] + data_manager.get_filter_options('payouts', 'basis'))
     
     # Apply filters
-    filtered_payouts = payout_details.copy()
+    mask = np.ones(len(payout_details), dtype=bool)
     if search_term:
-        filtered_payouts = filtered_payouts[
-            filtered_payouts['name'].str.contains(search_term, case=False, na=False)
-        ]
+        mask &= payout_details['name'].str.contains(search_term, case=False, na=False, regex=False).values
     if basis_filter != 'All':
-        filtered_payouts = filtered_payouts[filtered_payouts['basis'] == basis_filter]
+        mask &= (payout_details['basis'] == basis_filter).values
+    filtered_payouts = payout_details[mask]
     
     # Display table
     display_cols = ['name', 'platform', 'category', 'basis', 'rate', 'orders', 'total_payout']
@@ -568,12 +591,12 @@ def show_export_page():
     st.subheader("Current Data Summary")
 
     if len(data_manager.tracking_data) > 0:
-        # Ensure 'date' column is in datetime format
-        data_manager.tracking_data['date'] = pd.to_datetime(data_manager.tracking_data['date'], errors='coerce')
+        # Read dates locally; never write back into the shared frame
+        dates = pd.to_datetime(data_manager.tracking_data['date'], errors='coerce')
 
         # Compute min and max dates
-        min_date = data_manager.tracking_data['date'].min()
-        max_date = data_manager.tracking_data['date'].max()
+        min_date = dates.min()
+        max_date = dates.max()
 
         # Format date range safely
         if pd.notnull(min_date) and pd.notnull(max_date):
@@ -664,7 +687,11 @@ def show_database_management_page():
         st.markdown("Reload data from database to sync any external changes.")
         if st.button("🔄 Refresh Data from Database"):
             try:
-                data_manager.refresh_data_from_db()
+                # Re-read every table, including rows changed outside this app
+                if data_manager.db_manager:
+                    data_manager.db_manager.clear_table_cache()
+                _load_all_tables.clear()
+                data_manager.refresh_data_from_db(_load_all_tables())
                 st.success("✅ Data refreshed successfully!")
                 st.rerun()
             except Exception as e:
@@ -677,16 +704,17 @@ def show_database_management_page():
             try:
                 # Load sample CSV files we created
                 
-                influencers_df = pd.read_csv("sample data/sample_influencers.csv")
-                posts_df = pd.read_csv("sample data/sample_posts.csv") 
-                tracking_df = pd.read_csv("sample data/sample_tracking.csv")
-                payouts_df = pd.read_csv("sample data/sample_payouts.csv")
+                influencers_df = read_csv("sample data/sample_influencers.csv")
+                posts_df = read_csv("sample data/sample_posts.csv", date_columns=('date',))
+                tracking_df = read_csv("sample data/sample_tracking.csv", date_columns=('date',))
+                payouts_df = read_csv("sample data/sample_payouts.csv")
                 
                 # Save to database
                 success1 = data_manager.save_influencers_to_db(influencers_df)
                 success2 = data_manager.save_posts_to_db(posts_df)
                 success3 = data_manager.save_tracking_data_to_db(tracking_df)
                 success4 = data_manager.save_payouts_to_db(payouts_df)
+                _load_all_tables.clear()
                 
                 if all([success1, success2, success3, success4]):
                     st.success("✅ Sample data loaded successfully!")
@@ -710,6 +738,7 @@ def show_database_management_page():
             try:
                 if data_manager.db_manager:
                     data_manager.db_manager.clear_all_data()
+                    _load_all_tables.clear()
                     data_manager.refresh_data_from_db()
                     st.success("✅ All data cleared from database")
                 else:
@@ -14,10 +14,41 @@ try:
 except Exception as e:
     logger.warning(f"Database not available: {e}")
 
+# Allowed values checked by the upload validators
+VALID_PLATFORMS = ['Instagram', 'YouTube', 'Twitter', 'Facebook', 'TikTok', 'LinkedIn']
+VALID_BASIS = ['post', 'order']
+
+def safe_roi(revenue, cost):
+    """Vectorized ROI percentage, 0 wherever cost is zero or missing"""
+    revenue = np.asarray(revenue, dtype=np.float64)
+    cost = np.asarray(cost, dtype=np.float64)
+    out = np.zeros_like(revenue)
+    np.divide(revenue - cost, cost, out=out, where=cost > 0)
+    return out * 100
+
+def fetch_tables_from_db(db):
+    """Read all four tables from the database into a dict of DataFrames"""
+    return {
+        'influencers': db.get_influencers_df(),
+        'posts': db.get_posts_df(),
+        'tracking': db.get_tracking_data_df(),
+        'payouts': db.get_payouts_df()
+    }
+
 class DataManager:
     """Manages all data operations for the influencer campaign dashboard"""
     
-    def __init__(self):
+    def __init__(self, tables=None):
+        # tables: optional snapshot from fetch_tables_from_db to start from
+        # instead of querying the database again
+        # Structures derived from the tables, rebuilt lazily after any change;
+        # version increases every time a table is replaced
+        self._derived = {}
+        self.version = 0
+        # True only while the tables are exactly what refresh_data_from_db
+        # loaded, so SQL aggregates describe the same data
+        self._loaded_from_db = False
+        
         # Initialize with empty dataframes
         self.influencers = pd.DataFrame()
         self.posts = pd.DataFrame()
@@ -30,27 +61,273 @@ class DataManager:
         # Try to load data from database, but don't fail if connection issues
         if self.db_manager:
             try:
-                self.refresh_data_from_db()
+                self.refresh_data_from_db(tables)
             except Exception as e:
                 logger.warning(f"Could not load data from database on initialization: {e}")
                 # Continue with empty dataframes
     
-    def refresh_data_from_db(self):
-        """Load all data from database"""
+    @property
+    def influencers(self):
+        return self._influencers
+    
+    @influencers.setter
+    def influencers(self, df):
+        df = self._to_categorical(df, ['platform', 'category', 'gender'])
+        self._influencers = self._downcast_int32(df, ['follower_count'])
+        self._invalidate_derived()
+    
+    @property
+    def posts(self):
+        return self._posts
+    
+    @posts.setter
+    def posts(self, df):
+        df = self._sort_by_date(self._ensure_datetime(df))
+        df = self._to_categorical(df, ['platform'])
+        self._posts = self._downcast_int32(df, ['reach', 'likes', 'comments'])
+        self._invalidate_derived()
+    
+    @property
+    def tracking_data(self):
+        return self._tracking_data
+    
+    @tracking_data.setter
+    def tracking_data(self, df):
+        df = self._sort_by_date(self._ensure_datetime(df))
+        df = self._to_categorical(df, ['source', 'campaign'])
+        self._tracking_data = self._downcast_int32(df, ['orders'])
+        self._invalidate_derived()
+    
+    @property
+    def payouts(self):
+        return self._payouts
+    
+    @payouts.setter
+    def payouts(self, df):
+        df = self._to_categorical(df, ['basis'])
+        self._payouts = self._downcast_int32(df, ['orders'])
+        self._invalidate_derived()
+    
+    def _invalidate_derived(self):
+        """Drop cached structures derived from the current tables"""
+        self._derived = {}
+        self.version += 1
+        self._loaded_from_db = False
+    
+    def get_cached(self, key, compute):
+        """Get a value derived from the current tables, computing it once per data version.
+        
+        Values live in _derived, so they are dropped whenever a table changes
+        and never outlive this DataManager.
+        """
+        if key not in self._derived:
+            self._derived[key] = compute()
+        return self._derived[key]
+    
+    def get_influencer_codes(self, table):
+        """Get int32 codes mapping each row of a table to its influencer's position.
+        
+        Codes index into the unique influencer IDs; rows whose influencer is
+        unknown get the code n_influencers, so a boolean lookup array of size
+        n_influencers + 1 can filter any table with a single gather.
+        """
+        key = ('influencer_codes', table)
+        if key not in self._derived:
+            if 'influencer_index' not in self._derived:
+                ids = self.influencers['ID'].values if 'ID' in self.influencers.columns else np.array([])
+                self._derived['influencer_index'] = pd.Index(pd.unique(ids))
+            influencer_index = self._derived['influencer_index']
+            
+            df = {
+                'influencers': self.influencers,
+                'posts': self.posts,
+                'tracking': self.tracking_data,
+                'payouts': self.payouts
+            }[table]
+            id_column = 'ID' if table == 'influencers' else 'influencer_id'
+            
+            if id_column in df.columns:
+                codes = influencer_index.get_indexer(df[id_column].values).astype(np.int32)
+                codes[codes < 0] = len(influencer_index)
+            else:
+                codes = np.full(len(df), len(influencer_index), dtype=np.int32)
+            self._derived[key] = codes
+        
+        return self._derived[key]
+    
+    def get_filter_options(self, table, column):
+        """Get the distinct values of a column for filter widgets, cached per data version"""
+        key = ('filter_options', table, column)
+        if key not in self._derived:
+            df = {
+                'influencers': self.influencers,
+                'posts': self.posts,
+                'tracking': self.tracking_data,
+                'payouts': self.payouts
+            }[table]
+            self._derived[key] = list(df[column].unique()) if column in df.columns else []
+        
+        return self._derived[key]
+    
+    def get_tracking_with_influencers(self):
+        """Get tracking rows left-joined with influencer details, cached per data version.
+        
+        The frame is shared between callers and must not be modified in place.
+        """
+        if 'tracking_with_influencers' not in self._derived:
+            # Index lookup on ID rather than a hash merge; suffixes match merge's defaults
+            joined = self.tracking_data.join(
+                self.influencers.set_index('ID', drop=False),
+                on='influencer_id',
+                how='left',
+                lsuffix='_x',
+                rsuffix='_y'
+            )
+            joined.index = pd.RangeIndex(len(joined))
+            self._derived['tracking_with_influencers'] = joined
+        
+        return self._derived['tracking_with_influencers']
+    
+    @staticmethod
+    def _ensure_datetime(df):
+        """Normalize the date column to datetime64[ns] once when data is loaded"""
+        if 'date' in df.columns and df['date'].dtype != 'datetime64[ns]':
+            df = df.assign(date=pd.to_datetime(df['date'], errors='coerce').astype('datetime64[ns]'))
+        return df
+    
+    @staticmethod
+    def _sort_by_date(df):
+        """Keep date-keyed tables sorted by date so ranges can be found by binary search"""
+        if 'date' in df.columns and not df['date'].is_monotonic_increasing:
+            df = df.sort_values('date', kind='stable').reset_index(drop=True)
+        return df
+    
+    @staticmethod
+    def _to_categorical(df, columns):
+        """Store low-cardinality string columns as pandas categoricals"""
+        convert = {col: 'category' for col in columns
+                   if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)}
+        if convert:
+            df = df.astype(convert)
+        return df
+    
+    def get_tracking_arrays(self):
+        """Get contiguous numpy arrays for the hot tracking columns.
+        
+        Returns a dict with float64 'revenue', int32 'orders', int32
+        'influencer_code' (see get_influencer_codes) and int64 'date_i8'
+        (nanoseconds since epoch, NaT as the minimum int64).
+        """
+        if 'tracking_arrays' not in self._derived:
+            df = self.tracking_data
+            n = len(df)
+            
+            def column(name, dtype):
+                if name not in df.columns:
+                    return np.zeros(n, dtype=dtype)
+                return np.ascontiguousarray(df[name].to_numpy(dtype=dtype))
+            
+            if 'date' in df.columns:
+                date_i8 = np.ascontiguousarray(df['date'].values.view('i8'))
+            else:
+                date_i8 = np.full(n, np.iinfo(np.int64).min, dtype=np.int64)
+            
+            self._derived['tracking_arrays'] = {
+                'revenue': column('revenue', np.float64),
+                'orders': column('orders', np.int32),
+                'influencer_code': self.get_influencer_codes('tracking'),
+                'date_i8': date_i8
+            }
+        
+        return self._derived['tracking_arrays']
+    
+    @staticmethod
+    def _downcast_int32(df, columns):
+        """Store integer count columns as int32 when their values fit"""
+        int32 = np.iinfo(np.int32)
+        convert = {}
+        for col in columns:
+            if col in df.columns and pd.api.types.is_integer_dtype(df[col]) and df[col].dtype != np.int32:
+                if len(df) == 0 or (df[col].min() >= int32.min and df[col].max() <= int32.max):
+                    convert[col] = np.int32
+        if convert:
+            df = df.astype(convert)
+        return df
+    
+    def get_per_influencer_totals(self):
+        """Get revenue, orders, estimated cost and ROI per influencer.
+        
+        The frame is indexed by influencer_id, computed once per data version
+        and shared between callers, so it must not be modified in place.
+        """
+        if 'per_influencer_totals' not in self._derived:
+            if len(self.tracking_data) == 0:
+                totals = pd.DataFrame(columns=['revenue', 'orders', 'cost', 'roi'])
+            else:
+                # Sum by integer influencer code with bincount instead of hashing IDs;
+                # the extra last bucket collects IDs missing from influencers
+                arrays = self.get_tracking_arrays()
+                codes = arrays['influencer_code']
+                influencer_index = self._derived['influencer_index']
+                n_groups = len(influencer_index) + 1
+                
+                rows = np.bincount(codes, minlength=n_groups)[:-1]
+                # Missing revenue counts as 0, matching the NaN-skipping groupby sum
+                revenue = np.bincount(codes, weights=np.nan_to_num(arrays['revenue']), minlength=n_groups)[:-1]
+                orders = np.bincount(codes, weights=arrays['orders'], minlength=n_groups)[:-1]
+                
+                present = rows > 0
+                if pd.api.types.is_integer_dtype(self.tracking_data['revenue']):
+                    revenue = np.rint(revenue).astype(np.int64)
+                totals = pd.DataFrame(
+                    {'revenue': revenue[present], 'orders': np.rint(orders[present]).astype(np.int64)},
+                    index=pd.Index(influencer_index[present], name='influencer_id')
+                )
+                
+                # Estimate cost as 25% of revenue
+                totals['cost'] = totals['revenue'] * 0.25
+                totals['roi'] = safe_roi(totals['revenue'], totals['cost'])
+            self._derived['per_influencer_totals'] = totals
+        
+        return self._derived['per_influencer_totals']
+    
+    def refresh_data_from_db(self, tables=None):
+        """Load all data from database, or from an already fetched snapshot of it"""
         if not self.db_manager:
             logger.warning("Database not available, keeping current data")
             return
         
+        # Until the snapshot is in place the tables may not match the database
+        self._loaded_from_db = False
         try:
-            self.influencers = self.db_manager.get_influencers_df()
-            self.posts = self.db_manager.get_posts_df()
-            self.tracking_data = self.db_manager.get_tracking_data_df()
-            self.payouts = self.db_manager.get_payouts_df()
+            if tables is None:
+                tables = fetch_tables_from_db(self.db_manager)
+            self.influencers = tables['influencers']
+            self.posts = tables['posts']
+            self.tracking_data = tables['tracking']
+            self.payouts = tables['payouts']
+            self._loaded_from_db = True
             logger.info("Data successfully loaded from database")
         except Exception as e:
             logger.error(f"Error loading data from database: {e}")
             # Keep existing data if refresh fails
     
+    def query_tracking_summary(self, platform, brand, category, start_date=None, end_date=None):
+        """Get revenue and orders per platform from the database.
+        
+        Returns None when the database is unavailable, the tables were not
+        loaded from it or the query fails, so callers can aggregate the
+        in-memory tables instead.
+        """
+        if not (self.db_manager and self._loaded_from_db):
+            return None
+        
+        try:
+            return self.db_manager.get_tracking_summary(platform, brand, category, start_date, end_date)
+        except Exception as e:
+            logger.error(f"Error querying tracking summary: {e}")
+            return None
+    
     def save_influencers_to_db(self, df: pd.DataFrame) -> bool:
         """Save influencers data to database"""
         if not self.db_manager:
@@ -137,6 +414,14 @@ class DataManager:
             
         return errors
     
+    @staticmethod
+    def _has_invalid_dates(df):
+        """Check for date values that do not parse, skipping columns parsed at upload"""
+        if 'date' not in df.columns or pd.api.types.is_datetime64_any_dtype(df['date']):
+            return False
+        parsed = pd.to_datetime(df['date'], errors='coerce')
+        return bool((parsed.isna() & df['date'].notna()).any())
+    
     def _validate_influencers(self, df):
         """Validate influencers data"""
         errors = []
@@ -145,11 +430,11 @@ class DataManager:
             if not pd.api.types.is_numeric_dtype(df['follower_count']):
                 errors.append("follower_count must be numeric")
         
-        valid_platforms = ['Instagram', 'YouTube', 'Twitter', 'Facebook', 'TikTok', 'LinkedIn']
         if 'platform' in df.columns:
-            invalid_platforms = set(df['platform'].unique()) - set(valid_platforms)
-            if invalid_platforms:
-                errors.append(f"Invalid platforms: {invalid_platforms}. Valid platforms: {valid_platforms}")
+            invalid = ~df['platform'].isin(VALID_PLATFORMS)
+            if invalid.any():
+                invalid_platforms = set(df.loc[invalid, 'platform'].unique())
+                errors.append(f"Invalid platforms: {invalid_platforms}. Valid platforms: {VALID_PLATFORMS}")
         
         return errors
     
@@ -162,11 +447,8 @@ class DataManager:
             if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
                 errors.append(f"{col} must be numeric")
         
-        if 'date' in df.columns:
-            try:
-                pd.to_datetime(df['date'])
-            except:
-                errors.append("date column contains invalid dates")
+        if self._has_invalid_dates(df):
+            errors.append("date column contains invalid dates")
         
         return errors
     
@@ -179,11 +461,8 @@ class DataManager:
             if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
                 errors.append(f"{col} must be numeric")
         
-        if 'date' in df.columns:
-            try:
-                pd.to_datetime(df['date'])
-            except:
-                errors.append("date column contains invalid dates")
+        if self._has_invalid_dates(df):
+            errors.append("date column contains invalid dates")
         
         return errors
     
@@ -196,16 +475,22 @@ class DataManager:
             if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
                 errors.append(f"{col} must be numeric")
         
-        valid_basis = ['post', 'order']
         if 'basis' in df.columns:
-            invalid_basis = set(df['basis'].unique()) - set(valid_basis)
-            if invalid_basis:
-                errors.append(f"Invalid basis values: {invalid_basis}. Valid values: {valid_basis}")
+            invalid = ~df['basis'].isin(VALID_BASIS)
+            if invalid.any():
+                invalid_basis = set(df.loc[invalid, 'basis'].unique())
+                errors.append(f"Invalid basis values: {invalid_basis}. Valid values: {VALID_BASIS}")
         
         return errors
     
     def get_data_summary(self):
-        """Get summary statistics of loaded data"""
+        """Get summary statistics, from SQL aggregates when the data was loaded from the database"""
+        if self.db_manager and self._loaded_from_db:
+            try:
+                return self.db_manager.get_dashboard_summary()
+            except Exception as e:
+                logger.error(f"Error querying data summary, using in-memory data: {e}")
+        
         summary = {
             'influencers': {
                 'count': len(self.influencers),
@@ -235,60 +520,74 @@ class DataManager:
         if len(self.tracking_data) == 0 or len(self.influencers) == 0:
             return pd.DataFrame()
         
-        # Start with tracking data
-        merged_df = self.tracking_data.copy()
-        
-        # Add influencer information
-        merged_df = merged_df.merge(
-            self.influencers,
-            left_on='influencer_id',
-            right_on='ID',
+        # Attach influencer details through an index join on ID, keeping the ID column
+        merged_df = self.tracking_data.join(
+            self.influencers.set_index('ID', drop=False),
+            on='influencer_id',
             how='left'
         )
         
         # Add post information if available
         if len(self.posts) > 0:
-            # Group posts by influencer and date to get aggregated metrics
-            post_agg = self.posts.groupby(['influencer_id', 'date']).agg({
-                'reach': 'sum',
-                'likes': 'sum',
-                'comments': 'sum'
-            }).reset_index()
-            
-            merged_df = merged_df.merge(
-                post_agg,
-                on=['influencer_id', 'date'],
-                how='left'
-            )
+            # Aggregate posts per influencer and date once per data version,
+            # then align on that index
+            if 'posts_by_influencer_date' not in self._derived:
+                self._derived['posts_by_influencer_date'] = self.posts.groupby(
+                    ['influencer_id', 'date'], sort=False, observed=True
+                )[['reach', 'likes', 'comments']].sum()
+            post_agg = self._derived['posts_by_influencer_date']
+            merged_df = merged_df.join(post_agg, on=['influencer_id', 'date'], how='left')
         
         # Add payout information if available
         if len(self.payouts) > 0:
-            merged_df = merged_df.merge(
-                self.payouts,
+            merged_df = merged_df.join(
+                self.payouts.set_index('influencer_id'),
                 on='influencer_id',
-                how='left'
+                how='left',
+                lsuffix='_x',
+                rsuffix='_y'
             )
         
+        # merged_df is a fresh frame owned here, so renumber its rows in place
+        # rather than copying it through reset_index
+        merged_df.index = pd.RangeIndex(len(merged_df))
         return merged_df
     
+    def _rows_for_influencer(self, table, influencer_id):
+        """Get one influencer's rows of a table via a cached influencer_id -> positions map"""
+        df = {
+            'tracking': self.tracking_data,
+            'posts': self.posts,
+            'payouts': self.payouts
+        }[table]
+        
+        key = ('row_positions', table)
+        if key not in self._derived:
+            self._derived[key] = df.groupby('influencer_id', sort=False, observed=True).indices
+        
+        positions = self._derived[key].get(influencer_id, np.array([], dtype=np.intp))
+        return df.take(positions)
+    
     def get_influencer_performance(self, influencer_id):
         """Get detailed performance metrics for a specific influencer"""
         if len(self.tracking_data) == 0:
             return {}
         
-        # Filter data for the specific influencer
-        influencer_data = self.tracking_data[
-            self.tracking_data['influencer_id'] == influencer_id
-        ]
+        # Look up the influencer's rows through the cached position index
+        influencer_data = self._rows_for_influencer('tracking', influencer_id)
         
         if len(influencer_data) == 0:
             return {}
         
+        # Sum each column once, keeping its dtype and skipping missing values
+        total_revenue = influencer_data['revenue'].sum()
+        total_orders = influencer_data['orders'].sum()
+        
         # Calculate performance metrics
         performance = {
-            'total_revenue': influencer_data['revenue'].sum(),
-            'total_orders': influencer_data['orders'].sum(),
-            'avg_order_value': influencer_data['revenue'].sum() / max(influencer_data['orders'].sum(), 1),
+            'total_revenue': total_revenue,
+            'total_orders': total_orders,
+            'avg_order_value': total_revenue / max(total_orders, 1),
             'active_days': influencer_data['date'].nunique(),
             'campaigns': influencer_data['campaign'].unique().tolist(),
             'products': influencer_data['product'].unique().tolist()
@@ -296,24 +595,22 @@ class DataManager:
         
         # Add post metrics if available
         if len(self.posts) > 0:
-            influencer_posts = self.posts[
-                self.posts['influencer_id'] == influencer_id
-            ]
+            influencer_posts = self._rows_for_influencer('posts', influencer_id)
             
             if len(influencer_posts) > 0:
+                reach = influencer_posts['reach'].sum()
+                likes = influencer_posts['likes'].sum()
+                comments = influencer_posts['comments'].sum()
                 performance.update({
                     'total_posts': len(influencer_posts),
-                    'total_reach': influencer_posts['reach'].sum(),
-                    'total_engagement': influencer_posts['likes'].sum() + influencer_posts['comments'].sum(),
-                    'avg_engagement_rate': ((influencer_posts['likes'].sum() + influencer_posts['comments'].sum()) / 
-                                          max(influencer_posts['reach'].sum(), 1)) * 100
+                    'total_reach': reach,
+                    'total_engagement': likes + comments,
+                    'avg_engagement_rate': ((likes + comments) / max(reach, 1)) * 100
                 })
         
         # Add payout information if available
         if len(self.payouts) > 0:
-            influencer_payout = self.payouts[
-                self.payouts['influencer_id'] == influencer_id
-            ]
+            influencer_payout = self._rows_for_influencer('payouts', influencer_id)
             
             if len(influencer_payout) > 0:
                 performance.update({
@@ -329,20 +626,22 @@ class DataManager:
         summary = {}
         
         if len(self.influencers) > 0:
-            summary['influencer_summary'] = self.influencers.groupby(['platform', 'category']).agg({
-                'follower_count': ['count', 'mean', 'sum']
-            }).round(2)
+            summary['influencer_summary'] = self.influencers.groupby(['platform', 'category'], observed=True).agg(
+                count=('follower_count', 'count'),
+                mean=('follower_count', 'mean'),
+                sum=('follower_count', 'sum')
+            ).round(2)
         
         if len(self.tracking_data) > 0:
-            summary['campaign_summary'] = self.tracking_data.groupby('campaign').agg({
-                'revenue': 'sum',
-                'orders': 'sum',
-                'influencer_id': 'nunique'
-            }).round(2)
+            summary['campaign_summary'] = self.tracking_data.groupby('campaign', observed=True).agg(
+                revenue=('revenue', 'sum'),
+                orders=('orders', 'sum'),
+                unique_influencers=('influencer_id', 'nunique')
+            ).round(2)
             
-            summary['daily_performance'] = self.tracking_data.groupby('date').agg({
-                'revenue': 'sum',
-                'orders': 'sum'
-            }).round(2)
+            summary['daily_performance'] = self.tracking_data.groupby('date').agg(
+                revenue=('revenue', 'sum'),
+                orders=('orders', 'sum')
+            ).round(2)
         
         return summary
@@ -1,8 +1,12 @@
 import os
+import io
+import csv
+import threading
 import pandas as pd
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean
+from sqlalchemy import create_engine, select, text, Column, Integer, String, Float, DateTime, Text, Boolean, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from contextlib import contextmanager
 from datetime import datetime
 import logging
 
@@ -15,10 +19,14 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable not found")
 
-# Create engine with SSL configuration for Replit
+# Create engine with SSL configuration for Replit; the pool is shared by all
+# Streamlit sessions in the process and can be sized through the environment
 engine = create_engine(
     DATABASE_URL, 
     echo=False,
+    pool_size=int(os.getenv('DB_POOL_SIZE', 8)),
+    max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 16)),
+    pool_timeout=30,
     pool_pre_ping=True,
     pool_recycle=300,
     connect_args={
@@ -52,6 +60,9 @@ class Post(Base):
     likes = Column(Integer, nullable=False, default=0)
     comments = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Serves per-influencer lookups and the (influencer_id, date) post aggregation
+    __table_args__ = (Index('ix_posts_influencer_date', 'influencer_id', 'date'),)
 
 class TrackingData(Base):
     __tablename__ = "tracking_data"
@@ -66,281 +77,457 @@ class TrackingData(Base):
     orders = Column(Integer, nullable=False, default=0)
     revenue = Column(Float, nullable=False, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Serves per-influencer lookups and joins on (influencer_id, date)
+    __table_args__ = (Index('ix_tracking_influencer_date', 'influencer_id', 'date'),)
 
 class Payout(Base):
     __tablename__ = "payouts"
     
     id = Column(Integer, primary_key=True, index=True)
-    influencer_id = Column(Integer, nullable=False)
+    influencer_id = Column(Integer, nullable=False, index=True)
     basis = Column(String(20), nullable=False)  # 'post' or 'order'
     rate = Column(Float, nullable=False)
     orders = Column(Integer, nullable=False, default=0)
     total_payout = Column(Float, nullable=False, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+# Rows per multi-row INSERT, keeping each statement well under driver parameter limits
+INSERT_CHUNK_SIZE = 1000
+# Rows per fetch when streaming tables back into DataFrames
+READ_CHUNK_SIZE = 50000
+
+def _cast_frame(df: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    """Cast and rename DataFrame columns in one pass into the table's layout.
+    
+    columns maps each table column to (DataFrame column, type); the type
+    'datetime' parses the column with pd.to_datetime.
+    """
+    data = {}
+    for name, (source, dtype) in columns.items():
+        if dtype == 'datetime':
+            data[name] = pd.to_datetime(df[source])
+        else:
+            data[name] = df[source].astype(dtype)
+    return pd.DataFrame(data)
+
+def _clear_tables(session: Session, *models):
+    """Empty tables in the session's transaction.
+    
+    PostgreSQL uses a single TRUNCATE, which does not scan or log the deleted
+    rows; other backends fall back to a DELETE per table.
+    """
+    if session.connection().dialect.name == 'postgresql':
+        tables = ', '.join(model.__tablename__ for model in models)
+        session.execute(text(f"TRUNCATE TABLE {tables} RESTART IDENTITY CASCADE"))
+    else:
+        for model in models:
+            session.query(model).delete()
+
+def _copy_csv(frame: pd.DataFrame) -> str:
+    """Serialize a cast frame as the CSV rows of a COPY ... FROM STDIN.
+    
+    NaN floats are written as NaN, which is what the INSERT path stores;
+    other missing values are left as empty fields.
+    """
+    floats = frame.select_dtypes('float').columns
+    frame = frame.assign(**{
+        col: frame[col].astype(object).where(frame[col].notna(), 'NaN') for col in floats
+    })
+    return frame.to_csv(index=False, header=False, quoting=csv.QUOTE_NONNUMERIC)
+
+def _insert_frame(session: Session, table, frame: pd.DataFrame):
+    """Insert a cast frame in the session's transaction.
+    
+    PostgreSQL connections through psycopg2 stream the rows with COPY; other
+    backends fall back to chunked multi-row INSERT statements.
+    """
+    connection = session.connection()
+    dbapi_connection = connection.connection.dbapi_connection
+    
+    if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2':
+        # COPY skips Python-side column defaults, so fill created_at here
+        if 'created_at' in table.c and 'created_at' not in frame.columns:
+            frame = frame.assign(created_at=datetime.utcnow())
+        
+        buffer = io.StringIO(_copy_csv(frame))
+        # Missing timestamps are written as quoted empty fields; FORCE_NULL
+        # reads those as NULL instead of failing to parse an empty string
+        options = "FORMAT csv"
+        datetime_columns = frame.select_dtypes('datetime').columns
+        if len(datetime_columns):
+            options += f", FORCE_NULL ({', '.join(datetime_columns)})"
+        
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SET LOCAL synchronous_commit = OFF")
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(frame.columns)}) FROM STDIN WITH ({options})",
+                buffer
+            )
+        finally:
+            cursor.close()
+        return
+    
+    records = frame.to_dict(orient='records')
+    for start in range(0, len(records), INSERT_CHUNK_SIZE):
+        session.execute(table.insert(), records[start:start + INSERT_CHUNK_SIZE])
+
+# get_*_df return low-cardinality labels as categoricals and free text as
+# Arrow-backed strings, both far smaller than object columns of Python str
+
+# Engines whose schema has already been created in this process
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
 class DatabaseManager:
     """Manages database operations for the influencer campaign dashboard"""
     
     def __init__(self):
         self.engine = engine
         self.SessionLocal = SessionLocal
+        # Last DataFrame read per table, keyed by table name as (stamp, df)
+        self._table_cache = {}
         self.create_tables()
     
     def create_tables(self):
-        """Create all database tables"""
-        try:
-            Base.metadata.create_all(bind=self.engine)
-            logger.info("Database tables created successfully")
-        except Exception as e:
-            logger.error(f"Error creating tables: {e}")
-            raise
+        """Create all database tables, once per engine per process"""
+        with _schema_lock:
+            if id(self.engine) in _schema_ready:
+                return
+            try:
+                Base.metadata.create_all(bind=self.engine)
+                # create_all skips tables that already exist, so add any
+                # indexes introduced since those tables were created
+                for table in Base.metadata.sorted_tables:
+                    for index in table.indexes:
+                        index.create(bind=self.engine, checkfirst=True)
+                _schema_ready.add(id(self.engine))
+                logger.info("Database tables created successfully")
+            except Exception as e:
+                logger.error(f"Error creating tables: {e}")
+                raise
     
     def get_session(self) -> Session:
         """Get database session"""
         return self.SessionLocal()
     
+    @contextmanager
+    def session_scope(self):
+        """Yield a session that is rolled back on error and always closed"""
+        session = self.get_session()
+        try:
+            yield session
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
     def bulk_insert_influencers(self, df: pd.DataFrame) -> bool:
         """Insert influencers data from DataFrame"""
-        session = self.get_session()
         try:
-            # Clear existing data
-            session.query(Influencer).delete()
-            
-            # Insert new data
-            for _, row in df.iterrows():
-                influencer = Influencer(
-                    id=int(row['ID']),
-                    name=str(row['name']),
-                    category=str(row['category']),
-                    gender=str(row['gender']),
-                    follower_count=int(row['follower_count']),
-                    platform=str(row['platform'])
-                )
-                session.add(influencer)
-            
-            session.commit()
+            with self.session_scope() as session:
+                # Clear existing data
+                _clear_tables(session, Influencer)
+                
+                # Insert new data
+                frame = _cast_frame(df, {
+                    'id': ('ID', int),
+                    'name': ('name', str),
+                    'category': ('category', str),
+                    'gender': ('gender', str),
+                    'follower_count': ('follower_count', int),
+                    'platform': ('platform', str)
+                })
+                _insert_frame(session, Influencer.__table__, frame)
+                
+                session.commit()
             logger.info(f"Inserted {len(df)} influencers")
             return True
             
         except Exception as e:
-            session.rollback()
             logger.error(f"Error inserting influencers: {e}")
             return False
-        finally:
-            session.close()
     
     def bulk_insert_posts(self, df: pd.DataFrame) -> bool:
         """Insert posts data from DataFrame"""
-        session = self.get_session()
         try:
-            # Clear existing data
-            session.query(Post).delete()
-            
-            # Insert new data
-            for _, row in df.iterrows():
-                post = Post(
-                    influencer_id=int(row['influencer_id']),
-                    platform=str(row['platform']),
-                    date=pd.to_datetime(row['date']),
-                    url=str(row['URL']),
-                    caption=str(row['caption']),
-                    reach=int(row['reach']),
-                    likes=int(row['likes']),
-                    comments=int(row['comments'])
-                )
-                session.add(post)
-            
-            session.commit()
+            with self.session_scope() as session:
+                # Clear existing data
+                _clear_tables(session, Post)
+                
+                # Insert new data
+                frame = _cast_frame(df, {
+                    'influencer_id': ('influencer_id', int),
+                    'platform': ('platform', str),
+                    'date': ('date', 'datetime'),
+                    'url': ('URL', str),
+                    'caption': ('caption', str),
+                    'reach': ('reach', int),
+                    'likes': ('likes', int),
+                    'comments': ('comments', int)
+                })
+                _insert_frame(session, Post.__table__, frame)
+                
+                session.commit()
             logger.info(f"Inserted {len(df)} posts")
             return True
             
         except Exception as e:
-            session.rollback()
             logger.error(f"Error inserting posts: {e}")
             return False
-        finally:
-            session.close()
     
     def bulk_insert_tracking_data(self, df: pd.DataFrame) -> bool:
         """Insert tracking data from DataFrame"""
-        session = self.get_session()
         try:
-            # Clear existing data
-            session.query(TrackingData).delete()
-            
-            # Insert new data
-            for _, row in df.iterrows():
-                tracking = TrackingData(
-                    source=str(row['source']),
-                    campaign=str(row['campaign']),
-                    influencer_id=int(row['influencer_id']),
-                    user_id=str(row['user_id']),
-                    product=str(row['product']),
-                    date=pd.to_datetime(row['date']),
-                    orders=int(row['orders']),
-                    revenue=float(row['revenue'])
-                )
-                session.add(tracking)
-            
-            session.commit()
+            with self.session_scope() as session:
+                # Clear existing data
+                _clear_tables(session, TrackingData)
+                
+                # Insert new data
+                frame = _cast_frame(df, {
+                    'source': ('source', str),
+                    'campaign': ('campaign', str),
+                    'influencer_id': ('influencer_id', int),
+                    'user_id': ('user_id', str),
+                    'product': ('product', str),
+                    'date': ('date', 'datetime'),
+                    'orders': ('orders', int),
+                    'revenue': ('revenue', float)
+                })
+                _insert_frame(session, TrackingData.__table__, frame)
+                
+                session.commit()
             logger.info(f"Inserted {len(df)} tracking records")
             return True
             
         except Exception as e:
-            session.rollback()
             logger.error(f"Error inserting tracking data: {e}")
             return False
-        finally:
-            session.close()
     
     def bulk_insert_payouts(self, df: pd.DataFrame) -> bool:
         """Insert payouts data from DataFrame"""
-        session = self.get_session()
         try:
-            # Clear existing data
-            session.query(Payout).delete()
-            
-            # Insert new data
-            for _, row in df.iterrows():
-                payout = Payout(
-                    influencer_id=int(row['influencer_id']),
-                    basis=str(row['basis']),
-                    rate=float(row['rate']),
-                    orders=int(row['orders']),
-                    total_payout=float(row['total_payout'])
-                )
-                session.add(payout)
-            
-            session.commit()
+            with self.session_scope() as session:
+                # Clear existing data
+                _clear_tables(session, Payout)
+                
+                # Insert new data
+                frame = _cast_frame(df, {
+                    'influencer_id': ('influencer_id', int),
+                    'basis': ('basis', str),
+                    'rate': ('rate', float),
+                    'orders': ('orders', int),
+                    'total_payout': ('total_payout', float)
+                })
+                _insert_frame(session, Payout.__table__, frame)
+                
+                session.commit()
             logger.info(f"Inserted {len(df)} payout records")
             return True
             
         except Exception as e:
-            session.rollback()
             logger.error(f"Error inserting payouts: {e}")
             return False
-        finally:
-            session.close()
+    
+    def _read_table(self, model, query, parse_dates=None, dtypes=None) -> pd.DataFrame:
+        """Read a table into a DataFrame, reusing the previous read while it is unchanged.
+        
+        The row count, highest id and newest created_at are checked with one
+        cheap aggregate. This app's bulk loads always change that stamp, but an
+        UPDATE from another tool may not; clear_table_cache forces a fresh read.
+        The cached frame is shared between callers and must not be modified in place.
+        """
+        stamp_query = select(func.count(), func.max(model.id), func.max(model.created_at)).select_from(model)
+        with self.session_scope() as session:
+            stamp = tuple(session.execute(stamp_query).one())
+        
+        cached = self._table_cache.get(model.__tablename__)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        
+        dtypes = dtypes or {}
+        categorical = {col: dtype for col, dtype in dtypes.items() if dtype == 'category'}
+        compact = {col: dtype for col, dtype in dtypes.items() if dtype != 'category'}
+        
+        # Stream rows in chunks so the driver never buffers the whole result;
+        # strings are compacted per chunk, categoricals once on the full frame
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True)
+            chunks = [
+                chunk.astype(compact) if compact else chunk
+                for chunk in pd.read_sql_query(query, conn, parse_dates=parse_dates,
+                                               chunksize=READ_CHUNK_SIZE)
+            ]
+        
+        df = pd.concat(chunks, ignore_index=True, copy=False) if len(chunks) > 1 else chunks[0]
+        if categorical:
+            df = df.astype(categorical)
+        self._table_cache[model.__tablename__] = (stamp, df)
+        return df
+    
+    def clear_table_cache(self):
+        """Drop the cached table reads so the next reads query the tables again"""
+        self._table_cache = {}
     
     def get_influencers_df(self) -> pd.DataFrame:
         """Get influencers data as DataFrame"""
-        session = self.get_session()
-        try:
-            result = session.query(Influencer).all()
-            data = []
-            for row in result:
-                data.append({
-                    'ID': row.id,
-                    'name': row.name,
-                    'category': row.category,
-                    'gender': row.gender,
-                    'follower_count': row.follower_count,
-                    'platform': row.platform
-                })
-            return pd.DataFrame(data)
-        finally:
-            session.close()
+        query = select(
+            Influencer.id.label('ID'),
+            Influencer.name,
+            Influencer.category,
+            Influencer.gender,
+            Influencer.follower_count,
+            Influencer.platform
+        )
+        return self._read_table(Influencer, query, dtypes={
+            'name': 'string[pyarrow]',
+            'category': 'category',
+            'gender': 'category',
+            'platform': 'category'
+        })
     
     def get_posts_df(self) -> pd.DataFrame:
         """Get posts data as DataFrame"""
-        session = self.get_session()
-        try:
-            result = session.query(Post).all()
-            data = []
-            for row in result:
-                data.append({
-                    'influencer_id': row.influencer_id,
-                    'platform': row.platform,
-                    'date': row.date,
-                    'URL': row.url,
-                    'caption': row.caption,
-                    'reach': row.reach,
-                    'likes': row.likes,
-                    'comments': row.comments
-                })
-            return pd.DataFrame(data)
-        finally:
-            session.close()
+        query = select(
+            Post.influencer_id,
+            Post.platform,
+            Post.date,
+            Post.url.label('URL'),
+            Post.caption,
+            Post.reach,
+            Post.likes,
+            Post.comments
+        )
+        return self._read_table(Post, query, parse_dates=['date'], dtypes={
+            'platform': 'category',
+            'URL': 'string[pyarrow]',
+            'caption': 'string[pyarrow]'
+        })
     
     def get_tracking_data_df(self) -> pd.DataFrame:
         """Get tracking data as DataFrame"""
-        session = self.get_session()
-        try:
-            result = session.query(TrackingData).all()
-            data = []
-            for row in result:
-                data.append({
-                    'source': row.source,
-                    'campaign': row.campaign,
-                    'influencer_id': row.influencer_id,
-                    'user_id': row.user_id,
-                    'product': row.product,
-                    'date': row.date,
-                    'orders': row.orders,
-                    'revenue': row.revenue
-                })
-            return pd.DataFrame(data)
-        finally:
-            session.close()
+        query = select(
+            TrackingData.source,
+            TrackingData.campaign,
+            TrackingData.influencer_id,
+            TrackingData.user_id,
+            TrackingData.product,
+            TrackingData.date,
+            TrackingData.orders,
+            TrackingData.revenue
+        )
+        return self._read_table(TrackingData, query, parse_dates=['date'], dtypes={
+            'source': 'category',
+            'campaign': 'category',
+            'user_id': 'string[pyarrow]',
+            'product': 'string[pyarrow]'
+        })
     
     def get_payouts_df(self) -> pd.DataFrame:
         """Get payouts data as DataFrame"""
-        session = self.get_session()
-        try:
-            result = session.query(Payout).all()
-            data = []
-            for row in result:
-                data.append({
-                    'influencer_id': row.influencer_id,
-                    'basis': row.basis,
-                    'rate': row.rate,
-                    'orders': row.orders,
-                    'total_payout': row.total_payout
-                })
-            return pd.DataFrame(data)
-        finally:
-            session.close()
+        query = select(
+            Payout.influencer_id,
+            Payout.basis,
+            Payout.rate,
+            Payout.orders,
+            Payout.total_payout
+        )
+        return self._read_table(Payout, query, dtypes={
+            'basis': 'category'
+        })
+    
+    def get_tracking_summary(self, platform='All', brand='All', category='All',
+                             start_date=None, end_date=None) -> pd.DataFrame:
+        """Get revenue and orders per platform, filtered and aggregated in SQL"""
+        with self.session_scope() as session:
+            query = session.query(
+                Influencer.platform,
+                func.sum(TrackingData.revenue),
+                func.sum(TrackingData.orders)
+            ).join(Influencer, TrackingData.influencer_id == Influencer.id)
+            
+            if platform != 'All':
+                query = query.filter(Influencer.platform == platform)
+            if category != 'All':
+                query = query.filter(Influencer.category == category)
+            if brand != 'All':
+                query = query.filter(TrackingData.campaign == brand)
+            if start_date is not None and end_date is not None:
+                query = query.filter(TrackingData.date.between(start_date, end_date))
+            
+            rows = query.group_by(Influencer.platform).all()
+            return pd.DataFrame(rows, columns=['platform', 'revenue', 'orders'])
     
     def get_data_summary(self) -> dict:
         """Get summary statistics from database"""
-        session = self.get_session()
-        try:
-            summary = {
-                'influencers_count': session.query(Influencer).count(),
-                'posts_count': session.query(Post).count(),
-                'tracking_count': session.query(TrackingData).count(),
-                'payouts_count': session.query(Payout).count(),
+        def count(model):
+            return select(func.count()).select_from(model).scalar_subquery()
+        
+        # All counts and the revenue total come back from a single round trip
+        query = select(
+            count(Influencer).label('influencers_count'),
+            count(Post).label('posts_count'),
+            count(TrackingData).label('tracking_count'),
+            count(Payout).label('payouts_count'),
+            select(func.coalesce(func.sum(TrackingData.revenue), 0)).scalar_subquery().label('total_revenue')
+        )
+        with self.session_scope() as session:
+            return dict(session.execute(query).one()._mapping)
+    
+    def get_dashboard_summary(self) -> dict:
+        """Get the DataManager.get_data_summary structure from SQL aggregates"""
+        def total(column):
+            return func.coalesce(func.sum(column), 0)
+        
+        with self.session_scope() as session:
+            influencers_count = session.execute(select(func.count()).select_from(Influencer)).scalar_one()
+            platforms = session.execute(select(Influencer.platform).distinct()).scalars().all()
+            categories = session.execute(select(Influencer.category).distinct()).scalars().all()
+            posts = session.execute(
+                select(func.count(), func.min(Post.date), func.max(Post.date), total(Post.reach)).select_from(Post)
+            ).one()
+            tracking = session.execute(
+                select(func.count(), total(TrackingData.revenue), total(TrackingData.orders)).select_from(TrackingData)
+            ).one()
+            payouts = session.execute(
+                select(func.count(), total(Payout.total_payout)).select_from(Payout)
+            ).one()
+        
+        return {
+            'influencers': {
+                'count': influencers_count,
+                'platforms': list(platforms),
+                'categories': list(categories)
+            },
+            'posts': {
+                'count': posts[0],
+                'date_range': f"{posts[1]} to {posts[2]}" if posts[0] > 0 else "No data",
+                'total_reach': posts[3]
+            },
+            'tracking': {
+                'count': tracking[0],
+                'total_revenue': tracking[1],
+                'total_orders': tracking[2]
+            },
+            'payouts': {
+                'count': payouts[0],
+                'total_amount': payouts[1]
             }
-            
-            # Get total revenue if tracking data exists
-            if summary['tracking_count'] > 0:
-                total_revenue = session.query(TrackingData).with_entities(
-                    session.query(TrackingData.revenue).subquery().c.revenue
-                ).all()
-                summary['total_revenue'] = sum([r[0] for r in total_revenue]) if total_revenue else 0
-            else:
-                summary['total_revenue'] = 0
-                
-            return summary
-        finally:
-            session.close()
+        }
     
     def clear_all_data(self):
         """Clear all data from database"""
-        session = self.get_session()
         try:
-            session.query(Payout).delete()
-            session.query(TrackingData).delete()
-            session.query(Post).delete()
-            session.query(Influencer).delete()
-            session.commit()
+            with self.session_scope() as session:
+                _clear_tables(session, Payout, TrackingData, Post, Influencer)
+                session.commit()
             logger.info("All data cleared from database")
         except Exception as e:
-            session.rollback()
             logger.error(f"Error clearing data: {e}")
             raise
-        finally:
-            session.close()
 
-# Initialize database manager
+# Initialize the shared database manager; modules are imported once per
+# process, so every Streamlit session reuses this instance and its pool
 db_manager = DatabaseManager()
\ No newline at end of file
@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import data_models
+from analytics import AnalyticsEngine
+from data_models import DataManager
+
+
+class IncrementalRoasTest(unittest.TestCase):
+    def setUp(self):
+        # Keep the tests on the in-memory path regardless of DATABASE_URL
+        self._db_manager = data_models.db_manager
+        data_models.db_manager = None
+        
+        self.dm = DataManager()
+    
+    def tearDown(self):
+        data_models.db_manager = self._db_manager
+    
+    def test_missing_revenue_is_skipped(self):
+        self.dm.tracking_data = pd.DataFrame({
+            'influencer_id': [1, 1, 1, 1],
+            'date': ['2024-01-01', '2024-01-02', '2024-03-01', '2024-03-02'],
+            'orders': [1, 1, 1, 1],
+            'revenue': [1000.0, np.nan, 3000.0, 5000.0]
+        })
+        
+        roas = AnalyticsEngine().calculate_incremental_roas(self.dm)
+        
+        # Baseline mean 1000, recent mean 4000, cost 25% of 4000
+        self.assertAlmostEqual(roas, 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
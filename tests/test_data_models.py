@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import data_models
+from data_models import DataManager
+
+
+class DataManagerTest(unittest.TestCase):
+    def setUp(self):
+        # Keep the tests on the in-memory path regardless of DATABASE_URL
+        self._db_manager = data_models.db_manager
+        data_models.db_manager = None
+        
+        self.dm = DataManager()
+        self.dm.influencers = pd.DataFrame({
+            'ID': [1, 2],
+            'name': ['a', 'b'],
+            'category': ['Fitness', 'Yoga'],
+            'gender': ['Male', 'Female'],
+            'follower_count': [1000, 2000],
+            'platform': ['Instagram', 'YouTube']
+        })
+    
+    def tearDown(self):
+        data_models.db_manager = self._db_manager
+    
+    def test_missing_revenue_is_skipped(self):
+        self.dm.tracking_data = pd.DataFrame({
+            'influencer_id': [1, 1, 2],
+            'date': ['2024-01-01', '2024-01-02', '2024-01-03'],
+            'orders': [2, 3, 4],
+            'revenue': [5000.0, np.nan, 3000.0]
+        })
+        
+        totals = self.dm.get_per_influencer_totals()
+        
+        self.assertEqual(totals.loc[1, 'revenue'], 5000.0)
+        self.assertEqual(totals.loc[2, 'revenue'], 3000.0)
+        self.assertEqual(totals.loc[1, 'orders'], 5)
+        self.assertFalse(totals['roi'].isna().any())
+    
+    def test_influencer_performance_keeps_integer_orders(self):
+        self.dm.tracking_data = pd.DataFrame({
+            'influencer_id': [1, 1],
+            'date': ['2024-01-01', '2024-01-02'],
+            'campaign': ['c1', 'c1'],
+            'product': ['p1', 'p2'],
+            'orders': [2, 3],
+            'revenue': [5000.0, np.nan]
+        })
+        
+        performance = self.dm.get_influencer_performance(1)
+        
+        self.assertEqual(performance['total_revenue'], 5000.0)
+        self.assertEqual(performance['total_orders'], 5)
+        self.assertTrue(np.issubdtype(type(performance['total_orders']), np.integer))
+    
+    def test_summary_uses_frames_unless_loaded_from_db(self):
+        class StubDatabase:
+            def get_dashboard_summary(self):
+                return {'source': 'database'}
+        
+        self.dm.db_manager = StubDatabase()
+        
+        self.assertEqual(self.dm.get_data_summary()['influencers']['count'], 2)
+        
+        self.dm.refresh_data_from_db({
+            'influencers': self.dm.influencers,
+            'posts': pd.DataFrame(),
+            'tracking': pd.DataFrame(),
+            'payouts': pd.DataFrame()
+        })
+        self.assertEqual(self.dm.get_data_summary(), {'source': 'database'})
+        
+        self.dm.influencers = self.dm.influencers.head(1)
+        self.assertEqual(self.dm.get_data_summary()['influencers']['count'], 1)
+    
+    def test_tracking_summary_only_for_data_loaded_from_db(self):
+        class StubDatabase:
+            def get_tracking_summary(self, *filters):
+                return 'database'
+        
+        self.dm.db_manager = StubDatabase()
+        
+        self.assertIsNone(self.dm.query_tracking_summary('All', 'All', 'All'))
+        
+        self.dm.refresh_data_from_db({
+            'influencers': self.dm.influencers,
+            'posts': pd.DataFrame(),
+            'tracking': pd.DataFrame(),
+            'payouts': pd.DataFrame()
+        })
+        self.assertEqual(self.dm.query_tracking_summary('All', 'All', 'All'), 'database')
+        
+        self.dm.tracking_data = pd.DataFrame({'influencer_id': [1], 'date': ['2024-01-01'], 'orders': [1], 'revenue': [10.0]})
+        self.assertIsNone(self.dm.query_tracking_summary('All', 'All', 'All'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+try:
+    import database
+except Exception as e:
+    raise unittest.SkipTest(f"Database not available: {e}")
+
+
+class CopyCsvTest(unittest.TestCase):
+    def test_nan_floats_are_written_as_nan(self):
+        frame = pd.DataFrame({
+            'influencer_id': [1, 2],
+            'product': ['', 'Whey'],
+            'date': pd.to_datetime(['2024-01-01', None]),
+            'revenue': [np.nan, 1500.5]
+        })
+        
+        rows = database._copy_csv(frame).splitlines()
+        
+        self.assertEqual(rows, ['1,"","2024-01-01","NaN"', '2,"Whey","",1500.5'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import io
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from utils import _iter_frame_csv, read_csv
+
+
+class ReadCsvTest(unittest.TestCase):
+    def test_parses_iso_dates(self):
+        df = read_csv(io.BytesIO(b"id,date\n1,2024-03-15\n2,\n"), date_columns=('date',))
+        
+        self.assertEqual(df['date'].dtype, 'datetime64[ns]')
+        self.assertEqual(df['date'][0], pd.Timestamp('2024-03-15'))
+        self.assertTrue(pd.isna(df['date'][1]))
+    
+    def test_falls_back_to_pandas_for_non_iso_dates(self):
+        df = read_csv(io.BytesIO(b"id,date\n1,03/15/2024\n2,03/16/2024\n"), date_columns=('date',))
+        
+        self.assertEqual(df['date'].dtype, 'datetime64[ns]')
+        self.assertEqual(df['date'].tolist(), [pd.Timestamp('2024-03-15'), pd.Timestamp('2024-03-16')])
+        self.assertEqual(df['id'].tolist(), [1, 2])
+
+
+
+class IterFrameCsvTest(unittest.TestCase):
+    def test_matches_to_csv_on_mixed_dtypes(self):
+        df = pd.DataFrame({
+            'name': ['a', 'b, c', 'say "hi"', ''],
+            'platform': pd.Categorical(['Instagram', 'YouTube', 'Instagram', 'YouTube']),
+            'orders': [1, 2, 3, 4],
+            'revenue': [1500.5, np.nan, 0.25, 1e-05],
+            'active': [True, False, True, False],
+            'date': pd.to_datetime(['2024-01-01', '2024-01-02', None, '2024-01-04']),
+            'posted_at': pd.to_datetime(
+                ['2024-01-01 10:30:00.5', '2024-01-01 10:30:00', None, '2024-01-01 11:00:00.25'], format='ISO8601'
+            )
+        })
+        
+        text = ''.join(_iter_frame_csv(df))
+        
+        pd.testing.assert_frame_equal(pd.read_csv(io.StringIO(text)), pd.read_csv(io.StringIO(df.to_csv(index=False))))
+        self.assertIn('2024-01-01 10:30:00.500', text)
+        self.assertNotIn('10:30:00.500000', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
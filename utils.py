@@ -1,18 +1,115 @@
 import pandas as pd
+import numpy as np
 import io
-from datetime import datetime
+from bisect import bisect_right
+from itertools import chain
+import pyarrow as pa
+from pyarrow import csv as pacsv
+from datetime import date, datetime
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 import base64
 
-def export_to_csv(data_manager):
-    """Export campaign data to CSV format"""
+def read_csv(source, date_columns=()):
+    """Read a CSV with PyArrow's multithreaded parser into a numpy-backed DataFrame.
+    
+    date_columns are parsed to datetime64[ns] while reading; dates Arrow
+    cannot parse (e.g. 03/15/2024) are read as text and parsed by pandas.
+    """
+    convert_options = pacsv.ConvertOptions(
+        column_types={col: pa.timestamp('ns') for col in date_columns}
+    )
+    try:
+        return pacsv.read_csv(source, convert_options=convert_options).to_pandas()
+    except pa.ArrowInvalid:
+        if not date_columns:
+            raise
+    
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    convert_options = pacsv.ConvertOptions(
+        column_types={col: pa.string() for col in date_columns}
+    )
+    df = pacsv.read_csv(source, convert_options=convert_options).to_pandas()
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+# Rows per to_csv call when streaming the detailed table
+CSV_CHUNK_ROWS = 10000
+
+# Fixed text of the CSV report: title banner, section breaks and underlined headings
+_CSV_TITLE = "HEALTHKART INFLUENCER CAMPAIGN REPORT\n" + "=" * 50 + "\n\n"
+_CSV_SECTION_BREAK = "\n" + "=" * 50 + "\n\n"
+_CSV_SUMMARY_HEADING = "SUMMARY STATISTICS\n" + "-" * 20 + "\n"
+_CSV_DETAILED_HEADING = "DETAILED PERFORMANCE DATA\n" + "-" * 25 + "\n"
+_CSV_PLATFORM_HEADING = "PLATFORM SUMMARY\n" + "-" * 16 + "\n"
+_CSV_CAMPAIGN_HEADING = "CAMPAIGN PERFORMANCE\n" + "-" * 19 + "\n"
+
+def _arrow_csv_frame(df):
+    """Prepare datetime columns so Arrow writes them the way pandas' to_csv does"""
+    converted = {}
+    for col in df.columns:
+        if pd.api.types.is_datetime64_dtype(df[col]):
+            values = df[col].dropna()
+            if (values == values.dt.normalize()).all():
+                # Midnight-only timestamps are written as plain dates
+                converted[col] = pa.array(df[col].dt.date, type=pa.date32())
+            elif (values.dt.nanosecond == 0).all():
+                # Print only the fractional digits pandas would, e.g. 10:30:00.500
+                if (values.dt.microsecond == 0).all():
+                    unit = 's'
+                elif (values.dt.microsecond % 1000 == 0).all():
+                    unit = 'ms'
+                else:
+                    unit = 'us'
+                converted[col] = pa.array(df[col], type=pa.timestamp(unit))
+    
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for col, array in converted.items():
+        table = table.set_column(table.schema.get_field_index(col), col, array)
+    return table
+
+def _iter_frame_csv(df):
+    """Yield a DataFrame as CSV text, CSV_CHUNK_ROWS rows at a time.
+    
+    Uses Arrow's C++ CSV writer, which reads back as the same values as
+    to_csv but quotes the header and strings (even with quoting_style='needed')
+    and prints floats and booleans its own way, e.g. 1 for 1.0 and true for
+    True. If Arrow cannot convert or write the frame (e.g. mixed-type object
+    columns), the rows not yet written go through pandas' to_csv instead.
+    """
+    written = 0
+    try:
+        table = _arrow_csv_frame(df)
+        batches = table.to_batches(max_chunksize=CSV_CHUNK_ROWS) or [table]
+        for i, batch in enumerate(batches):
+            sink = io.BytesIO()
+            pacsv.write_csv(batch, sink, write_options=pacsv.WriteOptions(include_header=i == 0, quoting_style='needed'))
+            yield sink.getvalue().decode('utf-8')
+            written += batch.num_rows
+        return
+    except pa.ArrowException:
+        pass
+    
+    for start in range(written, max(len(df), 1), CSV_CHUNK_ROWS):
+        yield df.iloc[start:start + CSV_CHUNK_ROWS].to_csv(index=False, header=start == 0)
+
+def iter_csv(data_manager):
+    """Yield the campaign CSV report in chunks, for streaming downloads"""
+    
+    has_influencers = len(data_manager.influencers) > 0
+    has_posts = len(data_manager.posts) > 0
+    has_payouts = len(data_manager.payouts) > 0
     
-    # Create a comprehensive report combining all data
-    output = io.StringIO()
+    # Scan the tracking totals once for every use below
+    has_tracking = len(data_manager.tracking_data) > 0
+    total_revenue = data_manager.tracking_data['revenue'].sum() if has_tracking else 0
+    total_orders = data_manager.tracking_data['orders'].sum() if has_tracking else 0
     
     # Summary statistics
     summary_data = []
@@ -20,130 +117,188 @@ def export_to_csv(data_manager):
     summary_data.append(['Total Influencers', len(data_manager.influencers)])
     summary_data.append(['Total Posts', len(data_manager.posts)])
     summary_data.append(['Total Tracking Records', len(data_manager.tracking_data)])
-    summary_data.append(['Total Revenue', f"₹{data_manager.tracking_data['revenue'].sum():,.2f}" if len(data_manager.tracking_data) > 0 else "₹0"])
-    summary_data.append(['Total Orders', data_manager.tracking_data['orders'].sum() if len(data_manager.tracking_data) > 0 else 0])
+    summary_data.append(['Total Revenue', f"₹{total_revenue:,.2f}" if has_tracking else "₹0"])
+    summary_data.append(['Total Orders', total_orders])
     summary_data.append(['Report Generated', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
     
     # Write summary
-    output.write("HEALTHKART INFLUENCER CAMPAIGN REPORT\n")
-    output.write("="*50 + "\n\n")
-    output.write("SUMMARY STATISTICS\n")
-    output.write("-"*20 + "\n")
+    yield _CSV_TITLE
+    yield _CSV_SUMMARY_HEADING
+    yield "".join(f"{metric}: {value}\n" for metric, value in summary_data)
     
-    for row in summary_data:
-        output.write(f"{row[0]}: {row[1]}\n")
-    
-    output.write("\n" + "="*50 + "\n\n")
+    yield _CSV_SECTION_BREAK
     
     # Detailed performance data
-    if len(data_manager.tracking_data) > 0 and len(data_manager.influencers) > 0:
-        # Merge tracking data with influencer info
-        detailed_data = data_manager.tracking_data.merge(
-            data_manager.influencers,
-            left_on='influencer_id',
-            right_on='ID',
-            how='left'
-        )
+    if has_tracking and has_influencers:
+        # Tracking data with influencer info, shared with get_recommendations
+        detailed_data = data_manager.get_tracking_with_influencers()
         
         # Add posts data if available
-        if len(data_manager.posts) > 0:
-            posts_agg = data_manager.posts.groupby('influencer_id').agg({
-                'reach': 'sum',
-                'likes': 'sum',
-                'comments': 'sum'
-            }).reset_index()
+        if has_posts:
+            posts_agg = data_manager.posts.groupby('influencer_id').agg(
+                reach=('reach', 'sum'),
+                likes=('likes', 'sum'),
+                comments=('comments', 'sum')
+            )
             
-            detailed_data = detailed_data.merge(posts_agg, on='influencer_id', how='left')
+            # Look the aggregates up by influencer_id through their index
+            detailed_data = detailed_data.join(posts_agg, on='influencer_id', how='left',
+                                               lsuffix='_x', rsuffix='_y')
         
         # Add payout data if available
-        if len(data_manager.payouts) > 0:
-            detailed_data = detailed_data.merge(
-                data_manager.payouts[['influencer_id', 'basis', 'rate', 'total_payout']],
+        if has_payouts:
+            detailed_data = detailed_data.join(
+                data_manager.payouts.set_index('influencer_id')[['basis', 'rate', 'total_payout']],
                 on='influencer_id',
-                how='left'
+                how='left',
+                lsuffix='_x',
+                rsuffix='_y'
             )
         
-        output.write("DETAILED PERFORMANCE DATA\n")
-        output.write("-"*25 + "\n")
-        detailed_data.to_csv(output, index=False)
+        yield _CSV_DETAILED_HEADING
+        yield from _iter_frame_csv(detailed_data)
         
-        output.write("\n" + "="*50 + "\n\n")
+        yield _CSV_SECTION_BREAK
     
     # Platform summary
-    if len(data_manager.influencers) > 0:
-        platform_summary = data_manager.influencers.groupby('platform').agg({
-            'ID': 'count',
-            'follower_count': ['sum', 'mean']
-        }).round(2)
+    if has_influencers:
+        platform_summary = data_manager.influencers.groupby('platform', observed=True).agg(
+            influencers=('ID', 'count'),
+            total_followers=('follower_count', 'sum'),
+            avg_followers=('follower_count', 'mean')
+        ).round(2)
         
-        output.write("PLATFORM SUMMARY\n")
-        output.write("-"*16 + "\n")
-        platform_summary.to_csv(output)
+        yield _CSV_PLATFORM_HEADING
+        yield platform_summary.to_csv()
         
-        output.write("\n" + "="*50 + "\n\n")
+        yield _CSV_SECTION_BREAK
     
     # Campaign performance
-    if len(data_manager.tracking_data) > 0:
-        campaign_summary = data_manager.tracking_data.groupby('campaign').agg({
-            'revenue': 'sum',
-            'orders': 'sum',
-            'influencer_id': 'nunique'
-        }).round(2)
+    if has_tracking:
+        campaign_summary = data_manager.tracking_data.groupby('campaign', observed=True).agg(
+            revenue=('revenue', 'sum'),
+            orders=('orders', 'sum'),
+            unique_influencers=('influencer_id', 'nunique')
+        ).round(2)
         
-        output.write("CAMPAIGN PERFORMANCE\n")
-        output.write("-"*19 + "\n")
-        campaign_summary.to_csv(output)
-    
-    csv_string = output.getvalue()
-    output.close()
-    
-    return csv_string
+        yield _CSV_CAMPAIGN_HEADING
+        yield campaign_summary.to_csv()
+
+def export_to_csv(data_manager):
+    """Export campaign data to CSV format"""
+    return "".join(iter_csv(data_manager))
+
+# Paragraph and table styles are built once and shared by every export_to_pdf call
+_STYLES = getSampleStyleSheet()
+
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=24,
+    spaceAfter=30,
+    alignment=1  # Center alignment
+)
+
+_HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_STYLES['Heading2'],
+    fontSize=16,
+    spaceAfter=12,
+    textColor=colors.HexColor('#FF6B35')
+)
+
+def _table_style(align, header_font_size):
+    """Build the report's table style: orange header row, beige body, full grid"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#FF6B35')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), align),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+_METRICS_TABLE_STYLE = _table_style('LEFT', 12)
+_PLATFORM_TABLE_STYLE = _table_style('CENTER', 10)
+_PERFORMER_TABLE_STYLE = _table_style('CENTER', 9)
+
+def _platform_table_rows(influencers):
+    """Format per-platform follower stats as PDF table rows, one column at a time"""
+    stats = influencers.groupby('platform', observed=True).agg(
+        influencers=('ID', 'count'),
+        total_followers=('follower_count', 'sum'),
+        avg_followers=('follower_count', 'mean')
+    ).round(0).astype({'total_followers': 'int64', 'avg_followers': 'int64'})
+    
+    return np.column_stack([
+        stats.index.astype(str),
+        stats['influencers'].astype(str),
+        stats['total_followers'].map('{:,}'.format),
+        stats['avg_followers'].map('{:,}'.format)
+    ]).tolist()
+
+def _performer_table_rows(top_performers):
+    """Format top performers as PDF table rows, one column at a time"""
+    names = top_performers['name'].astype(str)
+    per_follower = top_performers['revenue_per_follower']
+    
+    return np.column_stack([
+        np.where(names.str.len() > 20, names.str.slice(0, 20) + "...", names),
+        top_performers['platform'].astype(str),
+        "₹" + top_performers['revenue'].map('{:,.0f}'.format),
+        top_performers['orders'].astype(int).astype(str),
+        np.where(per_follower.notna(), "₹" + per_follower.map('{:.2f}'.format), "N/A")
+    ]).tolist()
 
 def export_to_pdf(data_manager, analytics):
-    """Export insights and summary to PDF format"""
+    """Export insights and summary to PDF format, as a BytesIO positioned at the start"""
     
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
+    styles = _STYLES
     story = []
     
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=1  # Center alignment
-    )
+    has_influencers = len(data_manager.influencers) > 0
+    n_platforms = data_manager.influencers['platform'].nunique() if has_influencers else 0
     
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=12,
-        textColor=colors.HexColor('#FF6B35')
-    )
+    # Scan the tracking totals once for every use below
+    has_tracking = len(data_manager.tracking_data) > 0
+    total_revenue = data_manager.tracking_data['revenue'].sum() if has_tracking else 0
+    total_orders = data_manager.tracking_data['orders'].sum() if has_tracking else 0
+    
+    # The full dataset feeds every analytics section; ROI is computed once
+    # and shared with the ROI section and the recommendations
+    filtered_data = {
+        'tracking': data_manager.tracking_data,
+        'influencers': data_manager.influencers,
+        'posts': data_manager.posts,
+        'payouts': data_manager.payouts
+    }
+    roi_data = analytics.calculate_roi_roas(filtered_data) if has_tracking else None
+    
+    title_style = _TITLE_STYLE
+    heading_style = _HEADING_STYLE
     
     # Title
-    story.append(Paragraph("HealthKart Influencer Campaign Report", title_style))
-    story.append(Spacer(1, 20))
+    story.extend([Paragraph("HealthKart Influencer Campaign Report", title_style), Spacer(1, 20)])
     
     # Report metadata
-    story.append(Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y at %H:%M')}", styles['Normal']))
-    story.append(Spacer(1, 20))
+    story.extend([Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y at %H:%M')}", styles['Normal']), Spacer(1, 20)])
     
     # Executive Summary
     story.append(Paragraph("Executive Summary", heading_style))
     
+    revenue_text = f"{total_revenue:,.0f}" if has_tracking else "0"
     summary_text = f"""
     This report provides a comprehensive analysis of HealthKart's influencer campaign performance. 
-    The data encompasses {len(data_manager.influencers)} influencers across {len(data_manager.influencers['platform'].unique()) if len(data_manager.influencers) > 0 else 0} platforms, 
-    generating a total revenue of ₹{data_manager.tracking_data['revenue'].sum():,.0f if len(data_manager.tracking_data) > 0 else 0} 
-    from {data_manager.tracking_data['orders'].sum() if len(data_manager.tracking_data) > 0 else 0} orders.
+    The data encompasses {len(data_manager.influencers)} influencers across {n_platforms} platforms, 
+    generating a total revenue of ₹{revenue_text} 
+    from {total_orders} orders.
     """
     
-    story.append(Paragraph(summary_text, styles['Normal']))
-    story.append(Spacer(1, 20))
+    story.extend([Paragraph(summary_text, styles['Normal']), Spacer(1, 20)])
     
     # Key Metrics Table
     story.append(Paragraph("Key Performance Indicators", heading_style))
@@ -152,112 +307,49 @@ def export_to_pdf(data_manager, analytics):
         ['Metric', 'Value'],
         ['Total Influencers', str(len(data_manager.influencers))],
         ['Total Posts', str(len(data_manager.posts))],
-        ['Total Revenue', f"₹{data_manager.tracking_data['revenue'].sum():,.0f}" if len(data_manager.tracking_data) > 0 else "₹0"],
-        ['Total Orders', str(data_manager.tracking_data['orders'].sum() if len(data_manager.tracking_data) > 0 else 0)],
-        ['Average Order Value', f"₹{(data_manager.tracking_data['revenue'].sum() / max(data_manager.tracking_data['orders'].sum(), 1)):,.0f}" if len(data_manager.tracking_data) > 0 else "₹0"],
+        ['Total Revenue', f"₹{total_revenue:,.0f}" if has_tracking else "₹0"],
+        ['Total Orders', str(total_orders)],
+        ['Average Order Value', f"₹{(total_revenue / max(total_orders, 1)):,.0f}" if has_tracking else "₹0"],
     ]
     
     metrics_table = Table(metrics_data)
-    metrics_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#FF6B35')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    metrics_table.setStyle(_METRICS_TABLE_STYLE)
     
-    story.append(metrics_table)
-    story.append(Spacer(1, 20))
+    story.extend([metrics_table, Spacer(1, 20)])
     
     # Platform Analysis
-    if len(data_manager.influencers) > 0:
+    if has_influencers:
         story.append(Paragraph("Platform Performance Analysis", heading_style))
         
-        platform_stats = data_manager.influencers.groupby('platform').agg({
-            'ID': 'count',
-            'follower_count': ['sum', 'mean']
-        }).round(0)
-        
         platform_data = [['Platform', 'Influencers', 'Total Followers', 'Avg Followers']]
-        for platform, row in platform_stats.iterrows():
-            platform_data.append([
-                platform,
-                str(int(row[('ID', 'count')])),
-                f"{int(row[('follower_count', 'sum')]):,}",
-                f"{int(row[('follower_count', 'mean')]):,}"
-            ])
+        platform_data.extend(_platform_table_rows(data_manager.influencers))
         
-        platform_table = Table(platform_data)
-        platform_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#FF6B35')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        # LongTable splits across pages in linear time and repeats the header row
+        platform_table = LongTable(platform_data, repeatRows=1)
+        platform_table.setStyle(_PLATFORM_TABLE_STYLE)
         
-        story.append(platform_table)
-        story.append(Spacer(1, 20))
+        story.extend([platform_table, Spacer(1, 20)])
     
     # Top Performers
-    if len(data_manager.tracking_data) > 0 and len(data_manager.influencers) > 0:
+    if has_tracking and has_influencers:
         story.append(Paragraph("Top Performing Influencers", heading_style))
         
         # Get top performers
-        filtered_data = {
-            'tracking': data_manager.tracking_data,
-            'influencers': data_manager.influencers,
-            'posts': data_manager.posts,
-            'payouts': data_manager.payouts
-        }
-        
         top_performers = analytics.get_top_performers(filtered_data, limit=5)
         
         if len(top_performers) > 0:
             performer_data = [['Name', 'Platform', 'Revenue', 'Orders', 'Revenue per Follower']]
-            for _, row in top_performers.iterrows():
-                performer_data.append([
-                    row['name'][:20] + "..." if len(str(row['name'])) > 20 else str(row['name']),
-                    str(row['platform']),
-                    f"₹{row['revenue']:,.0f}",
-                    str(int(row['orders'])),
-                    f"₹{row['revenue_per_follower']:.2f}" if pd.notna(row['revenue_per_follower']) else "N/A"
-                ])
+            performer_data.extend(_performer_table_rows(top_performers))
             
-            performer_table = Table(performer_data)
-            performer_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#FF6B35')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            performer_table = LongTable(performer_data, repeatRows=1)
+            performer_table.setStyle(_PERFORMER_TABLE_STYLE)
             
-            story.append(performer_table)
-            story.append(Spacer(1, 20))
+            story.extend([performer_table, Spacer(1, 20)])
     
     # ROI Analysis
-    if len(data_manager.tracking_data) > 0:
+    if has_tracking:
         story.append(Paragraph("ROI & ROAS Analysis", heading_style))
         
-        filtered_data = {
-            'tracking': data_manager.tracking_data,
-            'influencers': data_manager.influencers,
-            'posts': data_manager.posts,
-            'payouts': data_manager.payouts
-        }
-        
-        roi_data = analytics.calculate_roi_roas(filtered_data)
-        
         roi_text = f"""
         <b>Return on Investment (ROI):</b> {roi_data['avg_roi']:.1f}%<br/>
         <b>Return on Ad Spend (ROAS):</b> {roi_data['avg_roas']:.2f}:1<br/>
@@ -269,89 +361,108 @@ def export_to_pdf(data_manager, analytics):
         ROI above 200% for influencer campaigns.
         """
         
-        story.append(Paragraph(roi_text, styles['Normal']))
-        story.append(Spacer(1, 20))
+        story.extend([Paragraph(roi_text, styles['Normal']), Spacer(1, 20)])
     
     # Recommendations
     story.append(Paragraph("Recommendations", heading_style))
     
-    recommendations = get_recommendations(data_manager, analytics)
-    for i, rec in enumerate(recommendations, 1):
-        story.append(Paragraph(f"{i}. {rec}", styles['Normal']))
-        story.append(Spacer(1, 8))
+    recommendations = get_recommendations(data_manager, analytics, roi_data=roi_data)
+    story.extend(chain.from_iterable(
+        (Paragraph(f"{i}. {rec}", styles['Normal']), Spacer(1, 8))
+        for i, rec in enumerate(recommendations, 1)
+    ))
     
     story.append(Spacer(1, 20))
     
     # Footer
     story.append(Paragraph("Report generated by HealthKart Analytics Dashboard", styles['Italic']))
     
-    # Build PDF
+    # Build PDF and hand back the buffer itself rather than a copy of its bytes
     doc.build(story)
-    pdf_data = buffer.getvalue()
-    buffer.close()
+    buffer.seek(0)
     
-    return pdf_data
+    return buffer
 
-def get_recommendations(data_manager, analytics):
-    """Generate actionable recommendations based on data analysis"""
+# (metric, low threshold, high threshold, message below low, message above high),
+# checked in this order by get_recommendations
+_RECOMMENDATION_RULES = (
+    ('roi', 150, 300,
+     "Consider optimizing campaign costs as ROI is below industry standards (target: >200%)",
+     "Excellent ROI performance! Consider scaling successful campaigns"),
+    ('engagement', 2, 5,
+     "Work on content strategy to improve engagement rates (currently below 2%)",
+     "High engagement rates detected! Leverage successful content formats"),
+    ('avg_order_value', 500, 2000,
+     "Focus on promoting higher-value products to increase average order value",
+     "Strong average order value! Consider expanding premium product campaigns"),
+)
+
+def get_recommendations(data_manager, analytics, roi_data=None):
+    """Generate actionable recommendations based on data analysis.
+    
+    Callers that already computed calculate_roi_roas over the full dataset
+    can pass it as roi_data to skip recomputing it.
+    """
     recommendations = []
     
     if len(data_manager.tracking_data) == 0:
         return ["Upload campaign data to generate personalized recommendations."]
     
+    has_influencers = len(data_manager.influencers) > 0
+    has_posts = len(data_manager.posts) > 0
+    
     # Analyze platform performance
-    if len(data_manager.influencers) > 0:
-        platform_revenue = data_manager.tracking_data.merge(
-            data_manager.influencers,
-            left_on='influencer_id',
-            right_on='ID',
-            how='left'
-        ).groupby('platform')['revenue'].sum().sort_values(ascending=False)
+    if has_influencers:
+        platform_revenue = data_manager.get_tracking_with_influencers().groupby(
+            'platform', observed=True
+        )['revenue'].sum().sort_values(ascending=False)
         
         if len(platform_revenue) > 0:
             top_platform = platform_revenue.index[0]
             recommendations.append(f"Focus investment on {top_platform} as it generates the highest revenue (₹{platform_revenue.iloc[0]:,.0f})")
     
     # Analyze ROI
-    filtered_data = {
-        'tracking': data_manager.tracking_data,
-        'influencers': data_manager.influencers,
-        'posts': data_manager.posts,
-        'payouts': data_manager.payouts
-    }
-    
-    roi_data = analytics.calculate_roi_roas(filtered_data)
+    if roi_data is None:
+        filtered_data = {
+            'tracking': data_manager.tracking_data,
+            'influencers': data_manager.influencers,
+            'posts': data_manager.posts,
+            'payouts': data_manager.payouts
+        }
+        roi_data = analytics.calculate_roi_roas(filtered_data)
     
-    if roi_data['avg_roi'] < 150:
-        recommendations.append("Consider optimizing campaign costs as ROI is below industry standards (target: >200%)")
-    elif roi_data['avg_roi'] > 300:
-        recommendations.append("Excellent ROI performance! Consider scaling successful campaigns")
+    metrics = {'roi': roi_data['avg_roi']}
     
     # Analyze engagement if posts data available
-    if len(data_manager.posts) > 0:
-        avg_engagement = ((data_manager.posts['likes'] + data_manager.posts['comments']) / 
-                         data_manager.posts['reach'] * 100).mean()
-        
-        if avg_engagement < 2:
-            recommendations.append("Work on content strategy to improve engagement rates (currently below 2%)")
-        elif avg_engagement > 5:
-            recommendations.append("High engagement rates detected! Leverage successful content formats")
+    if has_posts:
+        reach = data_manager.posts['reach'].to_numpy()
+        has_reach = reach > 0
+        engagement = (data_manager.posts['likes'].to_numpy()[has_reach]
+                      + data_manager.posts['comments'].to_numpy()[has_reach])
+        # Posts without reach have no defined rate and are left out of the mean
+        metrics['engagement'] = float((engagement / reach[has_reach]).mean() * 100) if has_reach.any() else np.nan
     
     # Order conversion analysis
     total_orders = data_manager.tracking_data['orders'].sum()
     total_revenue = data_manager.tracking_data['revenue'].sum()
     
     if total_orders > 0:
-        avg_order_value = total_revenue / total_orders
-        if avg_order_value < 500:
-            recommendations.append("Focus on promoting higher-value products to increase average order value")
-        elif avg_order_value > 2000:
-            recommendations.append("Strong average order value! Consider expanding premium product campaigns")
+        metrics['avg_order_value'] = total_revenue / total_orders
+    
+    for metric, low, high, low_message, high_message in _RECOMMENDATION_RULES:
+        value = metrics.get(metric)
+        if value is None:
+            continue
+        if value < low:
+            recommendations.append(low_message)
+        elif value > high:
+            recommendations.append(high_message)
     
     # Seasonal analysis
     if len(data_manager.tracking_data) > 30:  # If we have enough data
-        data_manager.tracking_data['month'] = pd.to_datetime(data_manager.tracking_data['date']).dt.month
-        monthly_performance = data_manager.tracking_data.groupby('month')['revenue'].sum()
+        # The DataManager stores dates as datetime64 on load, so no parsing is needed here
+        month = data_manager.tracking_data['date'].dt.month
+        monthly_performance = data_manager.tracking_data['revenue'].groupby(month).sum()
         
         if len(monthly_performance) > 1:
             best_month = monthly_performance.idxmax()
@@ -373,35 +484,38 @@ def get_recommendations(data_manager, analytics):
     
     return recommendations[:6]  # Limit to top 6 recommendations
 
+# Magnitude thresholds in ascending order, with the divisor and suffix used
+# from each threshold up; index 0 is below the smallest threshold
+_CURRENCY_THRESHOLDS = (1000, 100000, 10000000)
+_CURRENCY_UNITS = ((1, ""), (1000, "K"), (100000, "L"), (10000000, "Cr"))
+_NUMBER_THRESHOLDS = (1000, 1000000)
+_NUMBER_UNITS = ((1, ""), (1000, "K"), (1000000, "M"))
+
 def format_currency(amount):
     """Format currency in Indian Rupees"""
-    if amount >= 10000000:  # 1 crore
-        return f"₹{amount/10000000:.1f}Cr"
-    elif amount >= 100000:  # 1 lakh
-        return f"₹{amount/100000:.1f}L"
-    elif amount >= 1000:  # 1 thousand
-        return f"₹{amount/1000:.1f}K"
-    else:
-        return f"₹{amount:.0f}"
+    divisor, suffix = _CURRENCY_UNITS[bisect_right(_CURRENCY_THRESHOLDS, amount)]
+    if suffix:
+        return f"₹{amount/divisor:.1f}{suffix}"
+    return f"₹{amount:.0f}"
 
 def format_number(number):
     """Format large numbers with appropriate suffixes"""
-    if number >= 1000000:
-        return f"{number/1000000:.1f}M"
-    elif number >= 1000:
-        return f"{number/1000:.1f}K"
-    else:
-        return str(int(number))
+    divisor, suffix = _NUMBER_UNITS[bisect_right(_NUMBER_THRESHOLDS, number)]
+    if suffix:
+        return f"{number/divisor:.1f}{suffix}"
+    return str(int(number))
 
 def validate_date_range(start_date, end_date):
     """Validate date range inputs"""
     if start_date > end_date:
         return False, "Start date cannot be after end date"
     
-    if (end_date - start_date).days > 365:
+    # Day counts via ordinals, without building a timedelta
+    start_day, end_day = start_date.toordinal(), end_date.toordinal()
+    if end_day - start_day > 365:
         return False, "Date range cannot exceed 365 days"
     
-    if end_date > datetime.now().date():
+    if end_day > date.today().toordinal():
         return False, "End date cannot be in the future"
     
     return True, "Valid date range"
@@ -412,3 +526,41 @@ def calculate_growth_rate(current_value, previous_value):
         return 100 if current_value > 0 else 0
     
     return ((current_value - previous_value) / previous_value) * 100
+
+def lttb_downsample(xs, ys, threshold=2000):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+    
+    The first and last points are always kept; every bucket in between keeps the
+    point forming the largest triangle with the previous pick and the average of
+    the next bucket, which preserves visible peaks and valleys.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    xs = np.asarray(xs, dtype=np.float64)
+    xs = xs - xs[0]
+    ys = np.asarray(ys, dtype=np.float64)
+    
+    # threshold - 2 buckets spanning the points between the first and last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    edges = np.append(edges, n)
+    
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+        avg_x = xs[next_start:next_end].mean()
+        avg_y = ys[next_start:next_end].mean()
+        
+        area = np.abs(
+            (xs[a] - avg_x) * (ys[start:end] - ys[a]) -
+            (xs[a] - xs[start:end]) * (avg_y - ys[a])
+        )
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    
+    return keep